@@ -0,0 +1,98 @@
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import Database
+from models.money import to_minor
+
+# Random transfers between a fixed set of accounts from many threads at once.
+# Money only moves between accounts, so the total must be the same afterwards,
+# both in memory and after reopening the files from disk.
+# This is a correctness test under contention, not a scaling benchmark: the stripe
+# locks only keep transfers from waiting on each other, while the Python work still
+# runs one thread at a time under the GIL and every transfer passes through the
+# shared state lock and the journal. Extra threads help only by overlapping fsync
+# waits (group commit), so throughput stays roughly flat past a few threads.
+
+def seed(db, ids, balance):
+    for account_id in ids:
+        account = db.get_account(account_id)
+        account.balance = balance
+    if hasattr(db, "conn"):
+        with db.lock, db.conn:
+            db.conn.executemany("UPDATE accounts SET balance = ? WHERE account_id = ?", [(balance, account_id) for account_id in ids])
+    else:
+        db.save_to_json()
+
+def worker(db, ids, operations, seed_value, results):
+    rng = random.Random(seed_value)
+    accounts = [db.get_account(account_id) for account_id in ids]
+    done = rejected = 0
+    for _ in range(operations):
+        source, target = rng.sample(accounts, 2)
+        success, _ = db.transfer(source, target, rng.randrange(1, to_minor(50)))
+        if success:
+            done += 1
+        else:
+            rejected += 1
+    results.append((done, rejected))
+
+def total_balance(db, ids):
+    return sum(db.get_account(account_id).balance for account_id in ids)
+
+def run(threads, operations, accounts, backend, baseline):
+    directory = tempfile.mkdtemp(prefix="bank-concurrency-")
+    try:
+        db = Database(os.path.join(directory, "data.json"), journal=True, group_commit=True, compact_every=10 ** 6,
+                      log_path=os.path.join(directory, "log.jsonl"), backend=backend)
+        ids = [f"acc{i}" for i in range(accounts)]
+        for account_id in ids:
+            db.create_account("bench", account_id)
+        seed(db, ids, to_minor(1000))
+        expected = total_balance(db, ids)
+        results = []
+        workers = [threading.Thread(target=worker, args=(db, ids, operations // threads, index, results)) for index in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        done = sum(result[0] for result in results)
+        in_memory = total_balance(db, ids)
+        negative = sum(1 for account_id in ids if db.get_account(account_id).balance < 0)
+        db.close()
+        reopened = Database(os.path.join(directory, "data.json"), log_path=os.path.join(directory, "log.jsonl"), backend=backend)
+        on_disk = total_balance(reopened, ids)
+        reopened.close()
+        conserved = expected == in_memory == on_disk and negative == 0
+        rate = done / elapsed
+        baseline.setdefault("rate", rate)
+        print(f"{threads:>3} threads: {done:>7} transfers in {elapsed:7.3f} s "
+              f"({rate:9.0f}/s, x{rate / baseline['rate']:.2f}), total {'conserved' if conserved else 'BROKEN'}")
+        return conserved
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--operations", type=int, default=4000)
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    args = parser.parse_args()
+    print(f"{args.backend}: {args.operations} transfers between {args.accounts} accounts, journal with group commit")
+    print("Throughput is bounded by the GIL and the shared state lock; more threads do not scale it")
+    baseline = {}
+    ok = all([run(threads, args.operations, args.accounts, args.backend, baseline) for threads in args.threads])
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
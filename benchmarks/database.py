@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import PASSWORD, generate, username, user_id, account_id
+from models.database import Database
+from models.reports import LedgerSnapshot, build_report, type_total
+
+# Times the Database operations the app relies on over synthetic ledgers of growing
+# size and appends one JSON line per run to the results file, tagged with the commit,
+# so runs from different commits can be compared (--baseline). The file defaults to the
+# system temp directory, so benchmark runs never leave files in the working tree.
+#   python benchmarks/database.py --scales 1k 10k 100k --output /tmp/bank-results.jsonl
+#   python benchmarks/database.py --scales 1m --baseline /tmp/bank-results.jsonl
+
+# scale: (users, accounts, transactions)
+SCALES = {
+    "1k": (100, 200, 1000),
+    "10k": (1000, 2000, 10000),
+    "100k": (10000, 20000, 100000),
+    "1m": (50000, 100000, 1000000),
+    "10m": (200000, 400000, 10000000),
+}
+
+def timed(function):
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+def commit_id():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_scale(scale, directory, backend, ops, seed):
+    users, accounts, transactions = SCALES[scale]
+    path = os.path.join(directory, f"{scale}.json")
+    generate(path, users, accounts, transactions, seed)
+    rng = random.Random(seed)
+    results = []
+
+    def record(operation, count, seconds):
+        results.append({"scale": scale, "operation": operation, "ops": count, "seconds": round(seconds, 6),
+                        "per_op_us": round(seconds / count * 1e6, 3)})
+
+    holder = {}
+    log_path = os.path.join(directory, "log.jsonl")
+    record("load_from_json", 1, timed(lambda: holder.setdefault("db", Database(
+        path, journal=True, lazy=True, log_path=log_path, backend=backend))))
+    db = holder["db"]
+    try:
+        names = [username(rng.randrange(users)) for _ in range(5)]
+        # First checks pay for scrypt; repeats are answered by the verification cache
+        record("get_user_cold", len(set(names)), timed(lambda: [db.get_user(name, PASSWORD) for name in set(names)]))
+        record("get_user", ops, timed(lambda: [db.get_user(names[i % len(names)], PASSWORD) for i in range(ops)]))
+        user_ids = [user_id(rng.randrange(users)) for _ in range(ops)]
+        record("get_user_accounts", ops, timed(lambda: [db.get_user_accounts(uid) for uid in user_ids]))
+        account_ids = [account_id(rng.randrange(accounts)) for _ in range(ops)]
+        record("get_account_transactions", ops, timed(lambda: [db.get_account_transactions(aid) for aid in account_ids]))
+        live = [db.get_account(aid) for aid in account_ids]
+        record("add_deposit", ops, timed(lambda: [db.add_deposit(account, 100) for account in live]))
+        pairs = [(live[i], live[(i + 1) % len(live)]) for i in range(ops)]
+        record("transfer", ops, timed(lambda: [db.transfer(source, target, 1) for source, target in pairs if source is not target]))
+
+        def report():
+            totals = build_report(LedgerSnapshot.from_database(db))
+            return type_total(totals, "deposit"), type_total(totals, "transfer", "credit"), type_total(totals, "bill_payment")
+        record("generate_report", 1, timed(report))
+        record("save_to_json", 1, timed(db.save_to_json))
+    finally:
+        db.close()
+    return results
+
+def compare(results, baseline_path, backend):
+    baseline = {}
+    with open(baseline_path) as f:
+        for line in f:
+            run = json.loads(line)
+            if run.get("backend") == backend:
+                # Later runs win, so this ends up as the most recent run per operation
+                for result in run["results"]:
+                    baseline[(result["scale"], result["operation"])] = (run.get("commit"), result["per_op_us"])
+    for result in results:
+        previous = baseline.get((result["scale"], result["operation"]))
+        if previous is None:
+            continue
+        change = (result["per_op_us"] / previous[1] - 1) * 100 if previous[1] else 0.0
+        print(f"{result['scale']:>5} {result['operation']:<26} {previous[1]:>12.1f} -> {result['per_op_us']:>12.1f} мкс ({change:+.1f}% від {previous[0]})")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", nargs="+", choices=SCALES, default=["1k", "10k", "100k"])
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--ops", type=int, default=1000, help="повторів для точкових операцій")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=os.path.join(tempfile.gettempdir(), "bank-bench-results.jsonl"),
+                        help="файл результатів, до якого дописується цей запуск")
+    parser.add_argument("--baseline", help="попередній файл результатів для порівняння")
+    args = parser.parse_args()
+    results = []
+    directory = tempfile.mkdtemp(prefix="bank-bench-")
+    try:
+        for scale in args.scales:
+            scale_results = run_scale(scale, directory, args.backend, args.ops, args.seed)
+            for result in scale_results:
+                print(f"{result['scale']:>5} {result['operation']:<26} {result['ops']:>6} оп. {result['seconds']:>10.4f} с {result['per_op_us']:>12.1f} мкс/оп.")
+            results.extend(scale_results)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    if args.baseline:
+        compare(results, args.baseline, args.backend)
+    run = {"commit": commit_id(), "timestamp": datetime.now().isoformat(), "python": platform.python_version(),
+           "platform": platform.platform(), "backend": args.backend, "seed": args.seed, "results": results}
+    with open(args.output, "a") as f:
+        f.write(json.dumps(run) + "\n")
+    print(f"Результати дописано до {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.core import Transaction
+from models.storage import TransactionMap, ColumnarTransactionMap
+
+# The pre-__slots__ layout of Transaction, kept here only for comparison
+class DictTransaction:
+    def __init__(self, transaction_id, account_id, amount, transaction_type, timestamp=None):
+        self.transaction_id = transaction_id
+        self.account_id = account_id
+        self.amount = amount
+        self.transaction_type = transaction_type
+        self.timestamp = timestamp or datetime.now()
+
+def rows(count, accounts=1000):
+    start = datetime(2024, 1, 1)
+    account_ids = [f"acc{i}" for i in range(accounts)]
+    types = ["deposit", "transfer", "bill_payment"]
+    for i in range(count):
+        yield (f"tx{i}", account_ids[i % accounts], i % 500000, types[i % 3], start + timedelta(seconds=i))
+
+def build_dict(count):
+    return {r[0]: DictTransaction(*r) for r in rows(count)}
+
+def build_slots(count):
+    return {r[0]: Transaction(*r) for r in rows(count)}
+
+def build_lazy(count):
+    transactions = TransactionMap()
+    for r in rows(count):
+        transactions.add_record((r[0], r[1], r[2], r[3], r[4].isoformat()))
+    return transactions
+
+def build_columnar(count):
+    transactions = ColumnarTransactionMap()
+    for r in rows(count):
+        transactions[r[0]] = Transaction(*r)
+    return transactions
+
+def measure(build, count):
+    tracemalloc.start()
+    data = build(count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print(f"Транзакцій: {count}")
+    baseline = None
+    for name, build in (("dict", build_dict), ("slots", build_slots), ("raw records", build_lazy), ("columnar", build_columnar)):
+        used = measure(build, count)
+        baseline = baseline or used
+        print(f"{name:>14}: {used / 2 ** 20:8.1f} MiB  {used / count:6.0f} B/рядок  {used / baseline:5.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import os
+import random
+import sys
+import time
+from array import array
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.reports import LedgerSnapshot, build_report, load_numpy
+from models.storage import EPOCH, MICROSECOND
+
+np = load_numpy()
+
+TYPES = ["deposit", "transfer", "bill_payment"]
+
+def synthetic_snapshot(count, accounts=10000, days=365, seed=42):
+    start = (datetime(2024, 1, 1) - EPOCH) // MICROSECOND
+    span = days * 86400 * 1000000
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        columns = (
+            rng.integers(0, accounts, count, dtype=np.uint32),
+            rng.integers(-500000, 500000, count, dtype=np.int64),
+            np.sort(rng.integers(start, start + span, count, dtype=np.int64)),
+            rng.integers(0, len(TYPES), count, dtype=np.uint8)
+        )
+        codes = ("I", "q", "q", "B")
+        arrays = [array(code, column.tobytes()) for code, column in zip(codes, columns)]
+    else:
+        rng = random.Random(seed)
+        arrays = [
+            array("I", (rng.randrange(accounts) for _ in range(count))),
+            array("q", (rng.randrange(-500000, 500000) for _ in range(count))),
+            array("q", sorted(rng.randrange(start, start + span) for _ in range(count))),
+            array("B", (rng.randrange(len(TYPES)) for _ in range(count)))
+        ]
+    return LedgerSnapshot([f"acc{i}" for i in range(accounts)], list(TYPES), *arrays)
+
+def timed(function):
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or [100000, 1000000, 10000000, 30000000]
+    engines = [("numpy", True)] if np is not None else []
+    engines.append(("python", False))
+    window = (datetime(2024, 3, 1), datetime(2024, 4, 1))
+    print(f"{'рядків':>10} {'рушій':>7} {'увесь період, с':>16} {'березень, с':>12} {'млн рядків/с':>13}")
+    for size in sizes:
+        snapshot = synthetic_snapshot(size)
+        for name, use_numpy in engines:
+            # The pure-Python fallback is only timed where it finishes in reasonable time
+            if not use_numpy and size > 1000000 and np is not None:
+                continue
+            full = timed(lambda: build_report(snapshot, use_numpy=use_numpy))
+            ranged = timed(lambda: build_report(snapshot, *window, use_numpy=use_numpy))
+            print(f"{size:>10} {name:>7} {full:>16.3f} {ranged:>12.3f} {size / full / 1e6:>13.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.database import SCALES
+from benchmarks.synthetic import generate
+from models.database import Database
+from models.reports import LedgerSnapshot, build_report
+from models.snapshot import SnapshotReader
+from models.streaming import iter_json_sections
+
+# Load and save of the same synthetic ledger as data.json and as a binary snapshot.
+#   python benchmarks/snapshot.py --scales 10k 100k 1m
+# "load" is a full Database() start (snapshot plus indexes), "read" only decodes the
+# file, and "report" builds the report straight from the mmap without loading anything
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return time.perf_counter() - started, result
+
+def run_scale(scale, directory):
+    users, accounts, transactions = SCALES[scale]
+    json_path = os.path.join(directory, f"{scale}.json")
+    binary_path = os.path.join(directory, f"{scale}.snap")
+    log_path = os.path.join(directory, "log.jsonl")
+    generate(json_path, users, accounts, transactions)
+    db = Database(json_path, lazy=True, log_path=log_path)
+    db.write_snapshot(binary_path, "binary")
+    db.close()
+    rows = []
+    for name, path in (("json", json_path), ("binary", binary_path)):
+        load, db = timed(lambda: Database(path, lazy=True, log_path=log_path))
+        try:
+            # The JSON snapshot is rewritten as it is after a fresh start: pretty-printed
+            save, _ = timed(db.save_to_json)
+            if name == "json":
+                def read_json():
+                    with open(path) as f:
+                        for _ in iter_json_sections(f):
+                            pass
+                read, _ = timed(read_json)
+            else:
+                def read_binary():
+                    with SnapshotReader(path) as reader:
+                        list(reader.users())
+                        list(reader.accounts())
+                        reader.ids()
+                        columns = reader.columns()
+                        del columns
+                read, _ = timed(read_binary)
+        finally:
+            db.close()
+        rows.append((scale, name, os.path.getsize(path), load, read, save))
+
+    def report_from_mmap():
+        with SnapshotReader(binary_path) as reader:
+            snapshot = LedgerSnapshot(*reader.columns())
+            build_report(snapshot)
+            del snapshot
+    report, _ = timed(report_from_mmap)
+    return rows, report
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", nargs="+", choices=SCALES, default=["10k", "100k"])
+    args = parser.parse_args()
+    directory = tempfile.mkdtemp(prefix="bank-snapshot-")
+    print(f"{'обсяг':>6} {'формат':>7} {'розмір, МіБ':>12} {'старт, с':>9} {'читання, с':>11} {'запис, с':>9}")
+    try:
+        for scale in args.scales:
+            rows, report = run_scale(scale, directory)
+            for scale_name, name, size, load, read, save in rows:
+                print(f"{scale_name:>6} {name:>7} {size / 2 ** 20:>12.1f} {load:>9.3f} {read:>11.3f} {save:>9.3f}")
+            print(f"{scale:>6} звіт прямо з mmap: {report:.3f} с")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
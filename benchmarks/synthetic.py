@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import SNAPSHOT_VERSION
+from models.passwords import hash_password
+from models.storage import EPOCH, MICROSECOND
+
+# Deterministic synthetic ledgers in the data.json snapshot format. The same
+# (users, accounts, transactions, seed) always produces the same file, so timings
+# from different commits are measured on identical data. Items are written one
+# at a time, so even 10M transactions never sit in memory as a list.
+
+PASSWORD = "secret1"
+TYPES = ("deposit", "transfer", "bill_payment")
+START = datetime(2024, 1, 1)
+SPAN = timedelta(days=365)
+
+def username(index):
+    # Usernames may only contain letters: index in base 26
+    letters = ""
+    index += 1
+    while index:
+        index, digit = divmod(index - 1, 26)
+        letters = chr(ord("a") + digit) + letters
+    return "user" + letters
+
+def user_id(index):
+    return f"u{index:09d}"
+
+def account_id(index):
+    return f"a{index:09d}"
+
+def generate(path, users, accounts, transactions, seed=42):
+    rng = random.Random(seed)
+    # One fixed-salt hash shared by every user: loading must not re-hash anything
+    password = hash_password(PASSWORD, salt=seed.to_bytes(16, "little"))
+    start = (START - EPOCH) // MICROSECOND
+    span = SPAN // MICROSECOND
+    step = span // max(transactions, 1)
+    with open(path, "w") as f:
+        f.write(f'{{"version": {SNAPSHOT_VERSION}, "users": [\n')
+        for index in range(users):
+            role = "employee" if index % 100 == 99 else "client"
+            item = {"user_id": user_id(index), "username": username(index), "password": password, "role": role}
+            f.write(("" if index == 0 else ",\n") + json.dumps(item))
+        f.write('], "accounts": [\n')
+        for index in range(accounts):
+            item = {"account_id": account_id(index), "user_id": user_id(index % users),
+                    "balance": rng.randrange(0, 10000000), "is_blocked": False}
+            f.write(("" if index == 0 else ",\n") + json.dumps(item))
+        f.write('], "transactions": [\n')
+        for index in range(transactions):
+            # Timestamps mostly ascend with a little jitter, like a real posting log
+            micros = start + index * step + rng.randrange(0, step * 4 + 1)
+            transaction_type = rng.choice(TYPES)
+            amount = rng.randrange(1, 5000000)
+            item = {
+                "transaction_id": f"t{index:010d}",
+                "account_id": account_id(rng.randrange(accounts)),
+                "amount": amount if transaction_type == "deposit" else -amount if transaction_type == "bill_payment" else rng.choice((amount, -amount)),
+                "transaction_type": transaction_type,
+                "timestamp": (EPOCH + micros * MICROSECOND).isoformat()
+            }
+            f.write(("" if index == 0 else ",\n") + json.dumps(item))
+        f.write("]}\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Синтетичний знімок data.json")
+    parser.add_argument("output")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--accounts", type=int, default=2000)
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    generate(args.output, args.users, args.accounts, args.transactions, args.seed)
+
+if __name__ == "__main__":
+    main()
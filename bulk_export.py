@@ -0,0 +1,31 @@
+import argparse
+import sys
+from datetime import datetime
+from models.database import Database
+from models.exporter import export_csv, export_columnar
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Експорт виписок і журналу транзакцій у CSV або колонковий формат")
+    parser.add_argument("output", help="шлях до файлу або - для stdout")
+    parser.add_argument("--format", choices=("csv", "columnar"), default="csv")
+    parser.add_argument("--account", help="лише транзакції цього рахунку (виписка)")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="від цього моменту включно (ISO 8601)")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="до цього моменту, не включно (ISO 8601)")
+    parser.add_argument("--data", default="data.json")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    args = parser.parse_args(argv)
+    db = Database(args.data, lazy=True, backend=args.backend, read_only=True)
+    try:
+        if args.format == "csv":
+            target = sys.stdout if args.output == "-" else args.output
+            count = export_csv(db, target, args.account, args.start, args.end)
+        else:
+            target = sys.stdout.buffer if args.output == "-" else args.output
+            count = export_columnar(db, target, args.account, args.start, args.end)
+    finally:
+        db.close()
+    print(f"Експортовано транзакцій: {count}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
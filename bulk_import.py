@@ -0,0 +1,43 @@
+import argparse
+import sys
+from models.database import Database
+from models.importer import BulkImporter, KINDS
+
+def print_progress(importer):
+    imported = ", ".join(f"{kind}: {importer.imported[kind]}" for kind in KINDS)
+    skipped = sum(importer.skipped.values())
+    print(f"\r{importer.rows} рядків ({importer.rate():.0f}/с), {imported}, пропущено: {skipped}, помилок: {importer.error_count}",
+          end="", file=sys.stderr, flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Масовий імпорт користувачів, рахунків і транзакцій з CSV/JSONL",
+        epilog="Наявні користувачі (за іменем) і рахунки (за account_id) пропускаються без змін; транзакції "
+               "з наявним transaction_id замінюються. Повторний запуск безпечний для рядків з ідентифікаторами, "
+               "рядки без account_id чи transaction_id щоразу додаються як нові")
+    parser.add_argument("files", nargs="+", help="файли у порядку імпорту (users.csv, accounts.csv, transactions.jsonl ...)")
+    parser.add_argument("--kind", choices=KINDS, help="тип даних, якщо його не видно з назви файлу")
+    parser.add_argument("--data", default="data.json")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--journal", action="store_true", help="писати пакети в журнал замість повного знімка")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--commit", choices=("end", "batch"), default="end", help="зберігати в кінці або після кожного пакета")
+    args = parser.parse_args(argv)
+    db = Database(args.data, journal=args.journal, lazy=True, backend=args.backend)
+    try:
+        importer = BulkImporter(db, args.batch_size, args.commit, print_progress)
+        for path in args.files:
+            importer.import_file(path, args.kind)
+        importer.finish()
+    finally:
+        db.close()
+    print_progress(importer)
+    print(file=sys.stderr)
+    for line, kind, message in importer.errors:
+        print(f"{line} ({kind}): {message}", file=sys.stderr)
+    if importer.error_count > len(importer.errors):
+        print(f"... і ще {importer.error_count - len(importer.errors)} помилок", file=sys.stderr)
+    return 1 if importer.error_count else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+import argparse
+import os
+import sys
+from models.database import Database
+from models.snapshot import is_binary_snapshot
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Перетворення знімка даних між JSON і бінарним форматом")
+    parser.add_argument("source", help="data.json або бінарний знімок (разом з його журналом, якщо є)")
+    parser.add_argument("target")
+    parser.add_argument("--to", choices=("binary", "json"), help="формат результату; за замовчуванням протилежний до джерела")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.source):
+        print(f"Файл не знайдено: {args.source}", file=sys.stderr)
+        return 1
+    if os.path.abspath(args.target) == os.path.abspath(args.source):
+        print("Результат має бути окремим файлом", file=sys.stderr)
+        return 1
+    snapshot_format = args.to or ("json" if is_binary_snapshot(args.source) else "binary")
+    db = Database(args.source, lazy=True, read_only=True)
+    try:
+        db.write_snapshot(args.target, snapshot_format)
+    finally:
+        db.close()
+    print(f"Записано ({snapshot_format}): {args.target}, {os.path.getsize(args.target)} байт", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,32 @@
+import threading
 import customtkinter as ctk
-from models.core import UserRole, Transaction
+from models.core import UserRole
 from models.auth import AuthManager
-from models.utils import generate_id
-from models.database import Database
-from datetime import datetime
+from models.metrics import metrics
+from models.money import format_money
+from models.service import BankService
+from gui.widgets import Animator, VirtualList
 
 class BankingApp:
-    def __init__(self, root):
+    def __init__(self, root, backend="json", on_ready=None, on_error=None):
         self.root = root
         self.root.title("Елітна Банківська Система")
         self.root.geometry("900x700")
-        self.db = Database()
-        self.auth = AuthManager(self.db)
+        # Filled in by on_loaded() once the background load has finished
+        self.db = None
+        self.auth = None
+        self.service = None
+        self.loader = None
+        self.loaded = None
+        self.backend = backend
+        self.on_ready = on_ready
+        self.on_error = on_error
+        metrics.configure_from_env(lambda delay, callback: self.root.after(int(delay * 1000), callback))
         self.current_frame = None
+        self.frames = {}
+        self.bound = {}
+        self.messages = []
+        self.animator = Animator(self.root)
         self.selected_account = None
         self.COLORS = {
             "primary": "#3B82F6",
@@ -38,7 +52,99 @@ class BankingApp:
         ctk.set_appearance_mode("dark")
         ctk.set_default_color_theme("blue")
         self.root.configure(fg_color=self.COLORS["background"])
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.show_login_frame()
+        self.start_loading()
+
+    def start_loading(self):
+        # The snapshot is parsed on a worker thread while the login screen is already
+        # up. Tk is only touched from the main thread, which polls for the result
+        def load():
+            try:
+                from models.database import Database
+                self.loaded = Database(journal=True, lazy=True, async_writes=True, backend=self.backend)
+            except Exception as error:
+                self.loaded = error
+        self.loader = threading.Thread(target=load, name="database-load", daemon=True)
+        self.loader.start()
+        self.root.after(50, self.check_loaded)
+
+    def check_loaded(self):
+        if self.loader.is_alive():
+            self.root.after(50, self.check_loaded)
+        elif isinstance(self.loaded, Exception):
+            self.on_load_failed(self.loaded)
+        else:
+            self.on_loaded(self.loaded)
+
+    def on_loaded(self, db):
+        self.db = db
+        self.auth = AuthManager(self.db)
+        self.service = BankService(self.db)
+        if metrics.enabled:
+            metrics.instrument(self.db, "db")
+            metrics.instrument(self.auth, "auth")
+            metrics.instrument(self.service, "service")
+            metrics.instrument(self, "gui", [name for name in dir(self) if name.startswith("handle_")] + ["generate_report"])
+        self.dispatch_persistence()
+        self.set_loading(False)
+        if self.on_ready is not None:
+            self.on_ready()
+
+    def on_load_failed(self, error):
+        # Login and registration need the store, so their buttons stay disabled;
+        # the only way on is to load again
+        widgets = self.bound["login"]
+        widgets["progress"].stop()
+        widgets["progress"].pack_forget()
+        widgets["status"].configure(text=f"Не вдалося завантажити дані: {error}", text_color=self.COLORS["error"])
+        widgets["retry"].pack(pady=5)
+        if self.on_error is not None:
+            self.on_error(error)
+
+    def retry_loading(self):
+        widgets = self.bound["login"]
+        widgets["retry"].pack_forget()
+        widgets["status"].configure(text="⏳ Завантаження даних...", text_color=self.COLORS["text"])
+        widgets["progress"].pack(pady=5)
+        widgets["progress"].start()
+        self.start_loading()
+
+    def set_loading(self, loading, message=""):
+        widgets = self.bound["login"]
+        for button in widgets["buttons"]:
+            button.configure(state="disabled" if loading else "normal")
+        if not loading:
+            widgets["progress"].stop()
+            widgets["progress"].pack_forget()
+        widgets["status"].configure(text=message, text_color=self.COLORS["error"])
+        if not message:
+            widgets["status"].pack_forget()
+
+    def dispatch_persistence(self):
+        self.db.dispatch_acks()
+        self.root.after(50, self.dispatch_persistence)
+
+    def on_close(self):
+        # Flush queued writes before the window goes away. A load still in progress
+        # is waited for, so the half-opened store is closed cleanly as well
+        if self.loader is not None:
+            self.loader.join()
+            if self.db is None and not isinstance(self.loaded, Exception):
+                self.db = self.loaded
+        if self.db is not None:
+            self.db.close()
+        self.root.destroy()
+
+    def confirm_saved(self, label):
+        def on_saved(ok):
+            if not label.winfo_exists():
+                return
+            if ok:
+                label.configure(text=label.cget("text") + " ✓")
+            else:
+                label.configure(text="Помилка збереження даних", text_color=self.COLORS["error"])
+        self.db.when_durable(on_saved)
 
     def interpolate_color(self, start_color, end_color, t):
         start_rgb = tuple(int(start_color[i:i+2], 16) for i in (1, 3, 5))
@@ -46,30 +152,68 @@ class BankingApp:
         interpolated_rgb = tuple(int(start + (end - start) * t) for start, end in zip(start_rgb, end_rgb))
         return f"#{interpolated_rgb[0]:02x}{interpolated_rgb[1]:02x}{interpolated_rgb[2]:02x}"
 
-    def clear_frame(self, fade_out=False):
+    def clear_frame(self):
+        # Cached screens are only hidden and one-off screens destroyed; nothing here
+        # waits, the fade is played on the incoming screen by present()
+        self.animator.cancel("fade")
+        for label in self.messages:
+            if label.winfo_exists():
+                label.destroy()
+        self.messages = []
         if self.current_frame:
-            if fade_out:
-                start_color = self.COLORS["card"]
-                end_color = self.COLORS["background"]
-                for i in range(10, -1, -1):
-                    t = i / 10.0
-                    color = self.interpolate_color(start_color, end_color, t)
-                    self.current_frame.configure(fg_color=color)
-                    self.current_frame.update()
-                    self.current_frame.after(30)
-            self.current_frame.destroy()
+            if self.current_frame in self.frames.values():
+                self.current_frame.place_forget()
+            else:
+                self.current_frame.destroy()
+            self.current_frame = None
+
+    def make_frame(self):
+        return ctk.CTkFrame(self.root, fg_color=self.COLORS["card"], corner_radius=15, border_width=2, border_color=self.COLORS["accent"])
+
+    def present(self, frame):
+        self.current_frame = frame
+        frame.place(relx=0.5, rely=0.5, relwidth=0.9, relheight=0.9, anchor="center")
+        start_color = self.COLORS["background"]
+        end_color = self.COLORS["card"]
+        self.animator.animate("fade", 10, lambda t: frame.configure(fg_color=self.interpolate_color(start_color, end_color, t)))
+
+    def show_cached(self, name, build, refresh):
+        # The login, client and employee screens are built once; showing one again
+        # only refreshes the widgets that depend on the user and their accounts
+        self.clear_frame()
+        if name not in self.frames:
+            self.frames[name] = self.make_frame()
+            self.bound[name] = build(self.frames[name])
+        refresh(self.bound[name])
+        self.present(self.frames[name])
+
+    def add_message(self, text, color):
+        label = ctk.CTkLabel(self.current_frame, text=text, text_color=color, font=self.FONTS["text"])
+        label.pack()
+        self.messages.append(label)
+        return label
+
+    def set_entry(self, entry, text=""):
+        readonly = entry.cget("state") == "readonly"
+        if readonly:
+            entry.configure(state="normal")
+        entry.delete(0, "end")
+        if text:
+            entry.insert(0, text)
+        if readonly:
+            entry.configure(state="readonly")
 
     def show_login_frame(self):
-        self.clear_frame(fade_out=True)
-        self.current_frame = ctk.CTkFrame(self.root, fg_color=self.COLORS["card"], corner_radius=15, border_width=2, border_color=self.COLORS["accent"])
-        self.current_frame.place(relx=0.5, rely=0.5, relwidth=0.9, relheight=0.9, anchor="center")
+        self.show_cached("login", self.build_login_frame, self.refresh_login_frame)
+
+    def build_login_frame(self, frame):
         ctk.CTkLabel(
-            self.current_frame,
+            frame,
             text="🏦 Елітна Банківська Система",
             font=self.FONTS["title"],
             text_color=self.COLORS["accent"]
         ).pack(pady=20)
-        form_frame = ctk.CTkFrame(self.current_frame, fg_color=self.COLORS["card"], corner_radius=10)
+        form_frame = ctk.CTkFrame(frame, fg_color=self.COLORS["card"], corner_radius=10)
         form_frame.pack(pady=10, padx=20, fill="x")
         ctk.CTkLabel(form_frame, text="👤 Ім'я користувача", font=self.FONTS["label"], text_color=self.COLORS["text"]).pack(pady=(20, 5))
         username_entry = ctk.CTkEntry(
@@ -130,11 +274,35 @@ class BankingApp:
         register_button.pack(pady=5)
         register_button.bind("<Enter>", lambda e: register_button.configure(width=310, height=44))
         register_button.bind("<Leave>", lambda e: register_button.configure(width=300, height=40))
+        status_label = ctk.CTkLabel(form_frame, text="⏳ Завантаження даних...", font=self.FONTS["text"], text_color=self.COLORS["text"])
+        status_label.pack(pady=(10, 5))
+        progress = ctk.CTkProgressBar(form_frame, width=300, mode="indeterminate", progress_color=self.COLORS["accent"])
+        progress.pack(pady=5)
+        progress.start()
+        # Packed by on_load_failed only
+        retry_button = ctk.CTkButton(
+            form_frame,
+            text="🔄 Спробувати ще раз",
+            command=self.retry_loading,
+            font=self.FONTS["button"],
+            fg_color=self.COLORS["neutral"],
+            hover_color=self.COLORS["neutral_hover"],
+            corner_radius=10,
+            width=300,
+            height=40
+        )
+        login_button.configure(state="disabled")
+        register_button.configure(state="disabled")
+        return {"entries": [username_entry, password_entry], "buttons": [login_button, register_button],
+                "status": status_label, "progress": progress, "retry": retry_button}
+
+    def refresh_login_frame(self, widgets):
+        for entry in widgets["entries"]:
+            self.set_entry(entry)
 
     def show_register_frame(self):
-        self.clear_frame(fade_out=True)
-        self.current_frame = ctk.CTkFrame(self.root, fg_color=self.COLORS["card"], corner_radius=15, border_width=2, border_color=self.COLORS["accent"])
-        self.current_frame.place(relx=0.5, rely=0.5, relwidth=0.9, relheight=0.9, anchor="center")
+        self.clear_frame()
+        self.present(self.make_frame())
         ctk.CTkLabel(
             self.current_frame,
             text="📝 Створити обліковий запис",
@@ -242,55 +410,45 @@ class BankingApp:
         back_button.bind("<Leave>", lambda e: back_button.configure(width=300, height=40))
 
     def handle_register(self, username, password, confirm_password, role):
-        error_label = ctk.CTkLabel(self.current_frame, text="", text_color=self.COLORS["error"], font=self.FONTS["text"])
-        error_label.pack()
-        if not username or not password or not confirm_password:
-            error_label.configure(text="Усі поля обов'язкові")
-            return
-        if password != confirm_password:
-            error_label.configure(text="Паролі не збігаються")
-            return
-        if len(password) < 6:
-            error_label.configure(text="Пароль має містити щонайменше 6 символів")
-            return
-        if not all(c.isalpha() for c in username):
-            error_label.configure(text="Ім'я користувача має містити лише літери")
-            return
-        success, message = self.db.register_user(username, password, UserRole(role))
+        error_label = self.add_message("", self.COLORS["error"])
+        success, message = self.service.register(username, password, confirm_password, role)
         error_label.configure(text=message, text_color=self.COLORS["success"] if success else self.COLORS["error"])
         if success:
-            self.db.log_action(f"Користувач зареєстрований: {username}")
+            self.confirm_saved(error_label)
             self.root.after(1000, self.show_login_frame)
 
     def handle_login(self, username, password):
-        error_label = ctk.CTkLabel(self.current_frame, text="", text_color=self.COLORS["error"], font=self.FONTS["text"])
-        error_label.pack()
-        if self.auth.login(username, password):
-            self.db.log_action(f"Користувач увійшов: {username}")
+        error_label = self.add_message("", self.COLORS["error"])
+        success, message = self.service.login(self.auth, username, password)
+        if success:
             if self.auth.current_user.role == UserRole.CLIENT:
                 self.show_client_frame()
             else:
                 self.show_employee_frame()
         else:
-            error_label.configure(text="Невірне ім'я користувача або пароль")
+            error_label.configure(text=message)
 
     def show_client_frame(self):
-        self.clear_frame(fade_out=True)
-        self.current_frame = ctk.CTkFrame(self.root, fg_color=self.COLORS["card"], corner_radius=15, border_width=2, border_color=self.COLORS["accent"])
-        self.current_frame.place(relx=0.5, rely=0.5, relwidth=0.9, relheight=0.9, anchor="center")
-        accounts = self.db.get_user_accounts(self.auth.current_user.user_id)
+        accounts = self.service.accounts(self.auth)
         if not accounts:
-            ctk.CTkLabel(self.current_frame, text="Рахунки не знайдені", font=self.FONTS["label"], text_color=self.COLORS["text"]).pack(pady=20)
+            self.clear_frame()
+            frame = self.make_frame()
+            ctk.CTkLabel(frame, text="Рахунки не знайдені", font=self.FONTS["label"], text_color=self.COLORS["text"]).pack(pady=20)
+            self.present(frame)
             return
         self.selected_account = accounts[0]
-        ctk.CTkLabel(
-            self.current_frame,
-            text=f"👋 Вітаємо, {self.auth.current_user.username}",
+        self.show_cached("client", self.build_client_frame, lambda widgets: self.refresh_client_frame(widgets, accounts))
+
+    def build_client_frame(self, frame):
+        welcome_label = ctk.CTkLabel(
+            frame,
+            text="",
             font=self.FONTS["title"],
             text_color=self.COLORS["accent"]
-        ).pack(pady=10)
+        )
+        welcome_label.pack(pady=10)
         account_entry = ctk.CTkEntry(
-            self.current_frame,
+            frame,
             width=300,
             text_color=self.COLORS["text"],
             fg_color=self.COLORS["background"],
@@ -298,14 +456,12 @@ class BankingApp:
             corner_radius=8,
             state="readonly"
         )
-        account_entry.insert(0, self.selected_account.account_id)
         account_entry.pack(pady=5)
-        account_var = ctk.StringVar(value=self.selected_account.account_id)
+        account_var = ctk.StringVar()
         account_menu = ctk.CTkOptionMenu(
-            self.current_frame,
-            values=[account.account_id for account in accounts],
+            frame,
             variable=account_var,
-            command=lambda account_id: [self.update_selected_account(account_id, balance_label), account_entry.configure(state="normal"), account_entry.delete(0, "end"), account_entry.insert(0, account_id), account_entry.configure(state="readonly")],
+            command=lambda account_id: [self.update_selected_account(account_id, balance_label), self.set_entry(account_entry, account_id)],
             fg_color=self.COLORS["primary"],
             button_color=self.COLORS["primary"],
             button_hover_color=self.COLORS["primary_hover"],
@@ -316,13 +472,13 @@ class BankingApp:
         )
         account_menu.pack(pady=5)
         balance_label = ctk.CTkLabel(
-            self.current_frame,
-            text=f"💰 Баланс: ${self.selected_account.balance:.2f}",
+            frame,
+            text="",
             font=self.FONTS["subtitle"],
             text_color=self.COLORS["text"]
         )
         balance_label.pack(pady=5)
-        scrollable_frame = ctk.CTkScrollableFrame(self.current_frame, fg_color=self.COLORS["card"], corner_radius=10)
+        scrollable_frame = ctk.CTkScrollableFrame(frame, fg_color=self.COLORS["card"], corner_radius=10)
         scrollable_frame.pack(pady=10, padx=20, fill="both", expand=True)
         form_frame = ctk.CTkFrame(scrollable_frame, fg_color=self.COLORS["card"], corner_radius=10)
         form_frame.pack(fill="x")
@@ -474,99 +630,52 @@ class BankingApp:
         logout_button.pack(pady=30, side="bottom")
         logout_button.bind("<Enter>", lambda e: logout_button.configure(width=330, height=52))
         logout_button.bind("<Leave>", lambda e: logout_button.configure(width=320, height=48))
+        return {"welcome": welcome_label, "account_entry": account_entry, "account_var": account_var, "account_menu": account_menu,
+                "balance": balance_label, "entries": [deposit_amount, transfer_amount, recipient_username, bill_amount]}
+
+    def refresh_client_frame(self, widgets, accounts):
+        widgets["welcome"].configure(text=f"👋 Вітаємо, {self.auth.current_user.username}")
+        widgets["account_menu"].configure(values=[account.account_id for account in accounts])
+        widgets["account_var"].set(self.selected_account.account_id)
+        self.set_entry(widgets["account_entry"], self.selected_account.account_id)
+        widgets["balance"].configure(text=f"💰 Баланс: ${format_money(self.selected_account.balance)}")
+        for entry in widgets["entries"]:
+            self.set_entry(entry)
 
     def update_selected_account(self, account_id, balance_label):
-        accounts = self.db.get_user_accounts(self.auth.current_user.user_id)
+        accounts = self.service.accounts(self.auth)
         for account in accounts:
             if account.account_id == account_id:
                 self.selected_account = account
-                balance_label.configure(text=f"💰 Баланс: ${self.selected_account.balance:.2f}")
+                balance_label.configure(text=f"💰 Баланс: ${format_money(self.selected_account.balance)}")
                 break
 
+    def show_result(self, success, message, balance_label=None, account=None):
+        error_label = self.add_message(message, self.COLORS["success"] if success else self.COLORS["error"])
+        if success:
+            self.confirm_saved(error_label)
+            if balance_label is not None:
+                balance_label.configure(text=f"💰 Баланс: ${format_money(account.balance)}")
+
     def handle_deposit(self, account, amount_str, balance_label):
-        error_label = ctk.CTkLabel(self.current_frame, text="", text_color=self.COLORS["error"],
-                                   font=self.FONTS["text"])
-        error_label.pack()
-        try:
-            amount = float(amount_str)
-            if amount <= 0:
-                error_label.configure(text="Невірна сума")
-                return
-            success, message = self.db.add_deposit(account, amount)
-            if not success:
-                error_label.configure(text=message)
-                return
-            self.db.log_action(f"Депозит: ${amount:.2f} на рахунок {account.account_id}")
-            error_label.configure(text="Депозит успішний", text_color=self.COLORS["success"])
-            balance_label.configure(text=f"💰 Баланс: ${account.balance:.2f}")
-        except ValueError:
-            error_label.configure(text="Невірне введення")
+        success, message = self.service.deposit(self.auth, account, amount_str)
+        self.show_result(success, message, balance_label, account)
 
     def handle_transfer(self, account, amount_str, recipient_username, balance_label):
-        error_label = ctk.CTkLabel(self.current_frame, text="", text_color=self.COLORS["error"], font=self.FONTS["text"])
-        error_label.pack()
-        try:
-            amount = float(amount_str)
-            if account.is_blocked:
-                error_label.configure(text="Рахунок заблоковано")
-                return
-            if amount <= 0 or amount > account.balance:
-                error_label.configure(text="Невірна сума")
-                return
-            if recipient_username == self.auth.current_user.username:
-                error_label.configure(text="Неможливо переказати собі")
-                return
-            recipient_user = self.db.get_user_by_username(recipient_username)
-            if not recipient_user:
-                error_label.configure(text="Отримувача не знайдено")
-                return
-            recipient_accounts = self.db.get_user_accounts(recipient_user.user_id)
-            if not recipient_accounts:
-                error_label.configure(text="У отримувача немає активних рахунків")
-                return
-            recipient_account = recipient_accounts[0]  # Use first account of recipient
-            if recipient_account.is_blocked:
-                error_label.configure(text="Рахунок отримувача заблоковано")
-                return
-            account.balance -= amount
-            recipient_account.balance += amount
-            self.db.add_transaction(Transaction(generate_id(), account.account_id, -amount, "transfer"))
-            self.db.add_transaction(Transaction(generate_id(), recipient_account.account_id, amount, "transfer"))
-            self.db.log_action(f"Переказ: ${amount:.2f} з {account.account_id} на {recipient_account.account_id} (користувач: {recipient_username})")
-            error_label.configure(text="Переказ успішний", text_color=self.COLORS["success"])
-            balance_label.configure(text=f"💰 Баланс: ${account.balance:.2f}")
-        except ValueError:
-            error_label.configure(text="Невірне введення")
+        success, message = self.service.transfer(self.auth, account, amount_str, recipient_username)
+        self.show_result(success, message, balance_label, account)
 
     def handle_bill_payment(self, account, amount_str, balance_label):
-        error_label = ctk.CTkLabel(self.current_frame, text="", text_color=self.COLORS["error"], font=self.FONTS["text"])
-        error_label.pack()
-        try:
-            amount = float(amount_str)
-            if account.is_blocked:
-                error_label.configure(text="Рахунок заблоковано")
-                return
-            if amount <= 0 or amount > account.balance:
-                error_label.configure(text="Невірна сума")
-                return
-            account.balance -= amount
-            self.db.add_transaction(Transaction(generate_id(), account.account_id, -amount, "bill_payment"))
-            self.db.log_action(f"Оплата рахунку: ${amount:.2f} з {account.account_id}")
-            error_label.configure(text="Рахунок оплачено успішно", text_color=self.COLORS["success"])
-            balance_label.configure(text=f"💰 Баланс: ${account.balance:.2f}")
-        except ValueError:
-            error_label.configure(text="Невірне введення")
+        success, message = self.service.pay_bill(self.auth, account, amount_str)
+        self.show_result(success, message, balance_label, account)
 
     def handle_create_account(self):
-        account_id = generate_id()
-        self.db.create_account(self.auth.current_user.user_id, account_id)
-        self.db.log_action(f"Новий рахунок створено: {account_id} для користувача {self.auth.current_user.user_id}")
+        self.service.create_account(self.auth)
         self.show_client_frame()
 
     def show_transactions(self, account):
-        self.clear_frame(fade_out=True)
-        self.current_frame = ctk.CTkFrame(self.root, fg_color=self.COLORS["card"], corner_radius=15, border_width=2, border_color=self.COLORS["accent"])
-        self.current_frame.place(relx=0.5, rely=0.5, relwidth=0.9, relheight=0.9, anchor="center")
+        self.clear_frame()
+        self.present(self.make_frame())
         ctk.CTkLabel(
             self.current_frame,
             text="📜 Історія транзакцій",
@@ -578,7 +687,7 @@ class BankingApp:
             self.current_frame,
             values=["date_desc", "date_asc", "amount_desc", "amount_asc"],
             variable=sort_var,
-            command=lambda x: self.update_transactions(account, sort_var.get(), scroll_frame),
+            command=lambda x: self.update_transactions(account, sort_var.get(), transaction_list),
             fg_color=self.COLORS["primary"],
             button_color=self.COLORS["primary"],
             button_hover_color=self.COLORS["primary_hover"],
@@ -588,9 +697,16 @@ class BankingApp:
             dropdown_hover_color=self.COLORS["primary_hover"]
         )
         sort_menu.pack(pady=5)
-        scroll_frame = ctk.CTkScrollableFrame(self.current_frame, fg_color=self.COLORS["card"], corner_radius=10)
-        scroll_frame.pack(pady=10, padx=20, fill="both", expand=True)
-        self.update_transactions(account, sort_var.get(), scroll_frame)
+        transaction_list = VirtualList(
+            self.current_frame,
+            formatter=lambda t: f"{t.timestamp}: {t.transaction_type} ${format_money(t.amount)}",
+            font=self.FONTS["text"],
+            text_color=self.COLORS["text"],
+            fg_color=self.COLORS["card"],
+            corner_radius=10
+        )
+        transaction_list.pack(pady=10, padx=20, fill="both", expand=True)
+        self.update_transactions(account, sort_var.get(), transaction_list)
         back_button = ctk.CTkButton(
             self.current_frame,
             text="⬅ Назад",
@@ -608,37 +724,21 @@ class BankingApp:
         back_button.bind("<Enter>", lambda e: back_button.configure(width=310, height=44))
         back_button.bind("<Leave>", lambda e: back_button.configure(width=300, height=40))
 
-    def update_transactions(self, account, sort_key, scroll_frame):
-        for widget in scroll_frame.winfo_children():
-            widget.destroy()
-        transactions = self.db.get_account_transactions(account.account_id)
-        if sort_key == "date_desc":
-            transactions.sort(key=lambda t: t.timestamp, reverse=True)
-        elif sort_key == "date_asc":
-            transactions.sort(key=lambda t: t.timestamp)
-        elif sort_key == "amount_desc":
-            transactions.sort(key=lambda t: t.amount, reverse=True)
-        elif sort_key == "amount_asc":
-            transactions.sort(key=lambda t: t.amount)
-        for t in transactions:
-            ctk.CTkLabel(
-                scroll_frame,
-                text=f"{t.timestamp}: {t.transaction_type} ${t.amount:.2f}",
-                font=self.FONTS["text"],
-                text_color=self.COLORS["text"]
-            ).pack(pady=5, padx=10, anchor="w")
+    def update_transactions(self, account, sort_key, transaction_list):
+        transaction_list.set_items(self.service.transactions(self.auth, account, sort_key))
 
     def show_employee_frame(self):
-        self.clear_frame(fade_out=True)
-        self.current_frame = ctk.CTkFrame(self.root, fg_color=self.COLORS["card"], corner_radius=15, border_width=2, border_color=self.COLORS["accent"])
-        self.current_frame.place(relx=0.5, rely=0.5, relwidth=0.9, relheight=0.9, anchor="center")
-        ctk.CTkLabel(
-            self.current_frame,
-            text=f"🛠 Панель співробітника: {self.auth.current_user.username}",
+        self.show_cached("employee", self.build_employee_frame, self.refresh_employee_frame)
+
+    def build_employee_frame(self, frame):
+        title_label = ctk.CTkLabel(
+            frame,
+            text="",
             font=self.FONTS["title"],
             text_color=self.COLORS["accent"]
-        ).pack(pady=10)
-        form_frame = ctk.CTkFrame(self.current_frame, fg_color=self.COLORS["card"], corner_radius=10)
+        )
+        title_label.pack(pady=10)
+        form_frame = ctk.CTkFrame(frame, fg_color=self.COLORS["card"], corner_radius=10)
         form_frame.pack(pady=10, padx=20, fill="x")
         transactions_button = ctk.CTkButton(
             form_frame,
@@ -733,11 +833,16 @@ class BankingApp:
         logout_button.pack(pady=10)
         logout_button.bind("<Enter>", lambda e: logout_button.configure(width=310, height=44))
         logout_button.bind("<Leave>", lambda e: logout_button.configure(width=300, height=40))
+        return {"title": title_label, "entries": [account_id_entry]}
+
+    def refresh_employee_frame(self, widgets):
+        widgets["title"].configure(text=f"🛠 Панель співробітника: {self.auth.current_user.username}")
+        for entry in widgets["entries"]:
+            self.set_entry(entry)
 
     def show_all_transactions(self):
-        self.clear_frame(fade_out=True)
-        self.current_frame = ctk.CTkFrame(self.root, fg_color=self.COLORS["card"], corner_radius=15, border_width=2, border_color=self.COLORS["accent"])
-        self.current_frame.place(relx=0.5, rely=0.5, relwidth=0.9, relheight=0.9, anchor="center")
+        self.clear_frame()
+        self.present(self.make_frame())
         ctk.CTkLabel(
             self.current_frame,
             text="📜 Усі транзакції",
@@ -749,7 +854,7 @@ class BankingApp:
             self.current_frame,
             values=["date_desc", "date_asc", "amount_desc", "amount_asc"],
             variable=sort_var,
-            command=lambda x: self.update_all_transactions(sort_var.get(), scroll_frame),
+            command=lambda x: self.update_all_transactions(sort_var.get(), transaction_list),
             fg_color=self.COLORS["primary"],
             button_color=self.COLORS["primary"],
             button_hover_color=self.COLORS["primary_hover"],
@@ -759,9 +864,16 @@ class BankingApp:
             dropdown_hover_color=self.COLORS["primary_hover"]
         )
         sort_menu.pack(pady=5)
-        scroll_frame = ctk.CTkScrollableFrame(self.current_frame, fg_color=self.COLORS["card"], corner_radius=10)
-        scroll_frame.pack(pady=10, padx=20, fill="both", expand=True)
-        self.update_all_transactions(sort_var.get(), scroll_frame)
+        transaction_list = VirtualList(
+            self.current_frame,
+            formatter=lambda t: f"Рахунок {t.account_id}: {t.transaction_type} ${format_money(t.amount)} о {t.timestamp}",
+            font=self.FONTS["text"],
+            text_color=self.COLORS["text"],
+            fg_color=self.COLORS["card"],
+            corner_radius=10
+        )
+        transaction_list.pack(pady=10, padx=20, fill="both", expand=True)
+        self.update_all_transactions(sort_var.get(), transaction_list)
         back_button = ctk.CTkButton(
             self.current_frame,
             text="⬅ Назад",
@@ -779,76 +891,46 @@ class BankingApp:
         back_button.bind("<Enter>", lambda e: back_button.configure(width=310, height=44))
         back_button.bind("<Leave>", lambda e: back_button.configure(width=300, height=40))
 
-    def update_all_transactions(self, sort_key, scroll_frame):
-        for widget in scroll_frame.winfo_children():
-            widget.destroy()
-        transactions = self.db.get_all_transactions()
-        if sort_key == "date_desc":
-            transactions.sort(key=lambda t: t.timestamp, reverse=True)
-        elif sort_key == "date_asc":
-            transactions.sort(key=lambda t: t.timestamp)
-        elif sort_key == "amount_desc":
-            transactions.sort(key=lambda t: t.amount, reverse=True)
-        elif sort_key == "amount_asc":
-            transactions.sort(key=lambda t: t.amount)
-        for t in transactions:
-            ctk.CTkLabel(
-                scroll_frame,
-                text=f"Рахунок {t.account_id}: {t.transaction_type} ${t.amount:.2f} о {t.timestamp}",
-                font=self.FONTS["text"],
-                text_color=self.COLORS["text"]
-            ).pack(pady=5, padx=10, anchor="w")
+    def update_all_transactions(self, sort_key, transaction_list):
+        transaction_list.set_items(self.service.all_transactions(self.auth, sort_key))
 
     def handle_block_account(self, account_id):
-        error_label = ctk.CTkLabel(self.current_frame, text="", text_color=self.COLORS["error"], font=self.FONTS["text"])
-        error_label.pack()
-        self.db.block_account(account_id)
-        self.db.log_action(f"Рахунок заблоковано: {account_id}")
-        error_label.configure(text=f"Рахунок {account_id} заблоковано", text_color=self.COLORS["success"])
+        self.show_result(*self.service.block_account(self.auth, account_id))
 
     def handle_unblock_account(self, account_id):
-        error_label = ctk.CTkLabel(self.current_frame, text="", text_color=self.COLORS["error"], font=self.FONTS["text"])
-        error_label.pack()
-        self.db.unblock_account(account_id)
-        self.db.log_action(f"Рахунок розблоковано: {account_id}")
-        error_label.configure(text=f"Рахунок {account_id} розблоковано", text_color=self.COLORS["success"])
+        self.show_result(*self.service.unblock_account(self.auth, account_id))
 
     def generate_report(self):
-        self.clear_frame(fade_out=True)
-        self.current_frame = ctk.CTkFrame(self.root, fg_color=self.COLORS["card"], corner_radius=15, border_width=2, border_color=self.COLORS["accent"])
-        self.current_frame.place(relx=0.5, rely=0.5, relwidth=0.9, relheight=0.9, anchor="center")
+        self.clear_frame()
+        self.present(self.make_frame())
         ctk.CTkLabel(
             self.current_frame,
             text="📊 Звіт про транзакції",
             font=self.FONTS["title"],
             text_color=self.COLORS["accent"]
         ).pack(pady=10)
-        transactions = self.db.get_all_transactions()
-        total_deposits = sum(t.amount for t in transactions if t.transaction_type == "deposit")
-        total_transfers = sum(t.amount for t in transactions if t.transaction_type == "transfer" and t.amount > 0)
-        total_payments = sum(t.amount for t in transactions if t.transaction_type == "bill_payment")
+        success, report = self.service.report(self.auth)
+        totals = report["totals"]
         report_frame = ctk.CTkFrame(self.current_frame, fg_color=self.COLORS["card"], corner_radius=10)
         report_frame.pack(pady=10, padx=20, fill="x")
         ctk.CTkLabel(
             report_frame,
-            text=f"💰 Загальні депозити: ${total_deposits:.2f}",
+            text=f"💰 Загальні депозити: ${format_money(totals['deposits'])}",
             font=self.FONTS["label"],
             text_color=self.COLORS["text"]
         ).pack(pady=5)
         ctk.CTkLabel(
             report_frame,
-            text=f"💸 Загальні перекази: ${total_transfers:.2f}",
+            text=f"💸 Загальні перекази: ${format_money(totals['transfers'])}",
             font=self.FONTS["label"],
             text_color=self.COLORS["text"]
         ).pack(pady=5)
         ctk.CTkLabel(
             report_frame,
-            text=f"📄 Загальні оплати рахунків: ${-total_payments:.2f}",
+            text=f"📄 Загальні оплати рахунків: ${format_money(totals['payments'])}",
             font=self.FONTS["label"],
             text_color=self.COLORS["text"]
         ).pack(pady=5)
-        self.db.export_report(total_deposits, total_transfers, -total_payments)
-        self.db.log_action("Звіт експортовано")
         ctk.CTkLabel(
             self.current_frame,
             text="✅ Звіт експортовано до report.txt",
@@ -0,0 +1,98 @@
+import customtkinter as ctk
+
+# A scrollable list that only ever owns as many labels as fit on screen.
+# Scrolling reassigns their text instead of creating a widget per item, so the
+# cost of showing a list does not depend on how long it is.
+class VirtualList(ctk.CTkFrame):
+    def __init__(self, master, formatter, font=None, text_color=None, row_height=32, **kwargs):
+        super().__init__(master, **kwargs)
+        self.formatter = formatter
+        self.font = font
+        self.text_color = text_color
+        self.row_height = row_height
+        self.items = []
+        self.first = 0
+        self.labels = []
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.pack(side="left", fill="both", expand=True, padx=(10, 0), pady=5)
+        self.body.pack_propagate(False)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y", pady=5)
+        self.body.bind("<Configure>", self.on_resize)
+        self.bind_wheel(self)
+        self.bind_wheel(self.body)
+
+    def bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self.on_mousewheel)
+        widget.bind("<Button-4>", self.on_mousewheel)
+        widget.bind("<Button-5>", self.on_mousewheel)
+
+    def set_items(self, items):
+        self.items = items
+        self.first = 0
+        self.refresh()
+
+    def on_resize(self, event):
+        needed = max(1, int(event.height // self._apply_widget_scaling(self.row_height)))
+        while len(self.labels) < needed:
+            label = ctk.CTkLabel(self.body, text="", font=self.font, text_color=self.text_color, height=self.row_height, anchor="w")
+            label.pack(fill="x")
+            self.bind_wheel(label)
+            self.labels.append(label)
+        while len(self.labels) > needed:
+            self.labels.pop().destroy()
+        self.scroll_to(self.first)
+
+    def scroll_to(self, first):
+        self.first = max(0, min(first, len(self.items) - len(self.labels)))
+        self.refresh()
+
+    def refresh(self):
+        total = len(self.items)
+        for offset, label in enumerate(self.labels):
+            index = self.first + offset
+            label.configure(text=self.formatter(self.items[index]) if index < total else "")
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + len(self.labels)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def on_scrollbar(self, action, value, unit="units"):
+        if action == "moveto":
+            self.scroll_to(int(float(value) * len(self.items)))
+        elif action == "scroll":
+            step = len(self.labels) if unit == "pages" else 1
+            self.scroll_to(self.first + int(value) * step)
+
+    def on_mousewheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.scroll_to(self.first - 3)
+        else:
+            self.scroll_to(self.first + 3)
+
+# Plays animations from Tk's event loop: every step is its own after() callback, so
+# input is handled between steps and nothing ever blocks. Starting an animation
+# under a key that is still running replaces it.
+class Animator:
+    def __init__(self, widget, interval=30):
+        self.widget = widget
+        self.interval = interval
+        self.jobs = {}
+
+    def animate(self, key, steps, on_step, on_done=None):
+        self.cancel(key)
+
+        def step(index):
+            on_step(index / steps)
+            if index < steps:
+                self.jobs[key] = self.widget.after(self.interval, step, index + 1)
+            else:
+                self.jobs.pop(key, None)
+                if on_done is not None:
+                    on_done()
+        step(0)
+
+    def cancel(self, key):
+        job = self.jobs.pop(key, None)
+        if job is not None:
+            self.widget.after_cancel(job)
@@ -1,13 +1,46 @@
+import time
+
+# Taken before the heavier imports below, so --startup-timing includes them
+STARTED = time.perf_counter()
+
+import argparse
+import sys
 import customtkinter as ctk
 from gui.interface import BankingApp
 
 def main():
+    parser = argparse.ArgumentParser(description="Елітна Банківська Система")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--startup-timing", action="store_true",
+                        help="вивести час до першого вікна і до готовності входу, потім вийти")
+    args = parser.parse_args()
     ctk.set_appearance_mode("dark")
     ctk.set_default_color_theme("blue")
 
     root = ctk.CTk()
-    app = BankingApp(root)
+    marks = {"imports": time.perf_counter() - STARTED}
+    exit_code = {"value": 0}
+
+    def on_ready():
+        marks["login_ready"] = time.perf_counter() - STARTED
+        if args.startup_timing:
+            print(" ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in marks.items()), file=sys.stderr)
+            app.on_close()
+
+    def on_error(error):
+        # A timing run has nobody to press "retry", so it reports the failure and stops
+        if args.startup_timing:
+            exit_code["value"] = 1
+            print(f"Не вдалося завантажити дані: {error}", file=sys.stderr)
+            app.on_close()
+
+    app = BankingApp(root, backend=args.backend, on_ready=on_ready, on_error=on_error)
+    # Idle callbacks run after the redraws queued before them, i.e. once the
+    # login screen has actually been drawn
+    root.after_idle(lambda: marks.setdefault("first_window", time.perf_counter() - STARTED))
+    # BankingApp.on_close is the only way out of the loop and closes the database itself
     root.mainloop()
+    return exit_code["value"]
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,179 @@
+import gzip
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from models.metrics import metrics
+
+# JSON-lines audit log. log() only appends a dict to a buffer; a background thread
+# serializes and writes the buffer in batches. The active file is rotated by size
+# or by day into timestamped segments (optionally gzipped), and a manifest keeps
+# each segment's time range and account ids so query() can skip whole segments.
+class AuditLogger:
+    def __init__(self, path="log.jsonl", max_bytes=10 * 2 ** 20, rotate_daily=True, compress=True,
+                 flush_every=256, flush_interval=1.0):
+        self.path = path
+        self.base, self.ext = os.path.splitext(path)
+        self.manifest_path = self.base + ".manifest.json"
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.compress = compress
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.segments = self._load_manifest()
+        if os.path.exists(path):
+            # Stats of a file written by an earlier run are unknown, so queries always scan it
+            self.active = {"file": path, "start": None, "end": None, "accounts": None}
+            self.segment_day = datetime.fromtimestamp(os.path.getmtime(path)).date()
+        else:
+            self.active = {"file": path, "start": None, "end": None, "accounts": set()}
+            self.segment_day = datetime.now().date()
+        self._wake = threading.Event()
+        self._closed = False
+        self.thread = threading.Thread(target=self._run, name="audit", daemon=True)
+        self.thread.start()
+
+    def log(self, message, **fields):
+        record = {"ts": datetime.now().isoformat(), "message": message}
+        record.update(fields)
+        if "accounts" in record:
+            # Ids are compared and sorted as strings; a missing account is simply not recorded
+            record["accounts"] = [str(account) for account in record["accounts"] if account is not None]
+        with self.lock:
+            self.buffer.append(record)
+            full = len(self.buffer) >= self.flush_every
+        if full:
+            self._wake.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._try_flush()
+
+    def _try_flush(self):
+        try:
+            self.flush()
+        except Exception:
+            # The batch is back in the buffer, so the next flush retries it
+            logging.getLogger(__name__).exception("Не вдалося записати журнал аудиту")
+
+    def flush(self):
+        with self.write_lock:
+            with self.lock:
+                records, self.buffer = self.buffer, []
+            if not records:
+                return
+            try:
+                if self._should_rotate():
+                    self._rotate()
+                data = "".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(data)
+            except Exception:
+                # Nothing of this batch was written: put it back in front for the next flush
+                with self.lock:
+                    self.buffer[:0] = records
+                raise
+            if metrics.enabled:
+                metrics.add("audit_records", len(records))
+                metrics.add("audit_bytes", len(data.encode("utf-8")))
+            active = self.active
+            if active["start"] is None and active["accounts"] is not None:
+                active["start"] = records[0]["ts"]
+            active["end"] = records[-1]["ts"]
+            if active["accounts"] is not None:
+                for record in records:
+                    active["accounts"].update(record.get("accounts", ()))
+
+    def _should_rotate(self):
+        if not os.path.exists(self.path):
+            return False
+        if self.rotate_daily and self.segment_day != datetime.now().date():
+            return True
+        return os.path.getsize(self.path) >= self.max_bytes
+
+    def _rotate(self):
+        segment_path = f"{self.base}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}{self.ext}"
+        # Built before the rename, so nothing can fail between moving the file and listing it
+        entry = dict(self.active, file=segment_path)
+        if entry["accounts"] is not None:
+            entry["accounts"] = sorted(entry["accounts"])
+        os.replace(self.path, segment_path)
+        self.segments.append(entry)
+        self._save_manifest()
+        self.active = {"file": self.path, "start": None, "end": None, "accounts": set()}
+        self.segment_day = datetime.now().date()
+        if self.compress:
+            threading.Thread(target=self._compress, args=(entry,), daemon=True).start()
+
+    def _compress(self, entry):
+        source = entry["file"]
+        target = source + ".gz"
+        try:
+            with open(source, "rb") as f_in, gzip.open(target + ".tmp", "wb") as f_out:
+                while True:
+                    chunk = f_in.read(1 << 20)
+                    if not chunk:
+                        break
+                    f_out.write(chunk)
+            os.replace(target + ".tmp", target)
+            with self.write_lock:
+                entry["file"] = target
+                self._save_manifest()
+            os.remove(source)
+        except OSError:
+            pass
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)["segments"]
+        except (OSError, ValueError, KeyError):
+            return []
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"segments": self.segments}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+    def query(self, account_id=None, start=None, end=None):
+        self._try_flush()
+        start = start.isoformat() if start else None
+        end = end.isoformat() if end else None
+        with self.write_lock:
+            segments = [dict(segment) for segment in self.segments] + [dict(self.active)]
+        for segment in segments:
+            if start and segment["end"] and segment["end"] < start:
+                continue
+            if end and segment["start"] and segment["start"] >= end:
+                continue
+            if account_id and segment["accounts"] is not None and account_id not in segment["accounts"]:
+                continue
+            if not os.path.exists(segment["file"]):
+                continue
+            opener = gzip.open if segment["file"].endswith(".gz") else open
+            with opener(segment["file"], "rt", encoding="utf-8") as f:
+                for line in f:
+                    # Cheap substring test before paying for json.loads
+                    if account_id and account_id not in line:
+                        continue
+                    record = json.loads(line)
+                    if start and record["ts"] < start:
+                        continue
+                    if end and record["ts"] >= end:
+                        continue
+                    if account_id and account_id not in record.get("accounts", ()):
+                        continue
+                    yield record
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self.thread.join()
+        self._try_flush()
@@ -6,23 +6,92 @@ class UserRole(Enum):
     EMPLOYEE = "employee"
 
 class User:
+    __slots__ = ("user_id", "username", "password", "role")
+
     def __init__(self, user_id, username, password, role: UserRole):
         self.user_id = user_id
         self.username = username
         self.password = password
         self.role = role
 
+    def to_dict(self):
+        return {
+            "user_id": self.user_id,
+            "username": self.username,
+            "password": self.password,
+            "role": self.role.value
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["user_id"], data["username"], data["password"], UserRole(data["role"]))
+
 class Account:
-    def __init__(self, account_id, user_id, balance=0.0):
+    # __weakref__ keeps Account usable in the SQLite backend's identity map
+    __slots__ = ("account_id", "user_id", "balance", "is_blocked", "__weakref__")
+
+    def __init__(self, account_id, user_id, balance=0):
         self.account_id = account_id
         self.user_id = user_id
         self.balance = balance
         self.is_blocked = False
 
+    def to_dict(self):
+        return {
+            "account_id": self.account_id,
+            "user_id": self.user_id,
+            "balance": self.balance,
+            "is_blocked": self.is_blocked
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        account = cls(data["account_id"], data["user_id"], data["balance"])
+        account.is_blocked = data["is_blocked"]
+        return account
+
 class Transaction:
+    __slots__ = ("transaction_id", "account_id", "amount", "transaction_type", "timestamp")
+
     def __init__(self, transaction_id, account_id, amount, transaction_type, timestamp=None):
         self.transaction_id = transaction_id
         self.account_id = account_id
         self.amount = amount
         self.transaction_type = transaction_type
-        self.timestamp = timestamp or datetime.now()
\ No newline at end of file
+        self.timestamp = timestamp or datetime.now()
+
+    def to_dict(self):
+        return {
+            "transaction_id": self.transaction_id,
+            "account_id": self.account_id,
+            "amount": self.amount,
+            "transaction_type": self.transaction_type,
+            "timestamp": self.timestamp.isoformat()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["transaction_id"],
+            data["account_id"],
+            data["amount"],
+            data["transaction_type"],
+            datetime.fromisoformat(data["timestamp"])
+        )
+
+    def to_record(self):
+        return (self.transaction_id, self.account_id, self.amount, self.transaction_type, self.timestamp.isoformat())
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(record[0], record[1], record[2], record[3], datetime.fromisoformat(record[4]))
+
+    @staticmethod
+    def record_to_dict(record):
+        return {
+            "transaction_id": record[0],
+            "account_id": record[1],
+            "amount": record[2],
+            "transaction_type": record[3],
+            "timestamp": record[4]
+        }
@@ -1,173 +1,548 @@
 import json
 import os
-from datetime import datetime
+import stat
+import tempfile
+import threading
+from bisect import bisect_left
+from datetime import datetime, date
+from functools import partial
 from models.core import User, Account, Transaction, UserRole
+from models.journal import Journal
+from models.locking import FileLock
+from models.metrics import metrics
+from models.money import to_minor, migrate_item
+from models.passwords import is_hashed
+from models.persistence import PersistenceWorker
+from models.snapshot import SnapshotReader, capture, is_binary_snapshot, write_snapshot
+from models.storage import TransactionMap, ColumnarTransactionMap, SortedIndex, Ledger, OrderedView, build_indexes, timestamp_key
+from models.store import DAILY_DEPOSIT_LIMIT, Store
+from models.streaming import iter_json_sections
 from models.utils import generate_id
 
-class Database:
-    def __init__(self, file_path="data.json"):
-        self.file_path = file_path
-        self.log_file = "log.txt"
+SNAPSHOT_VERSION = 2
+
+def _fsync_directory(directory):
+    # Makes a rename durable; directories cannot be opened this way on Windows
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+# The JSON store: everything in memory, persisted as a snapshot plus an optional journal.
+# Database(..., backend="sqlite") hands out a SQLiteDatabase instead
+class Database(Store):
+    def __new__(cls, *args, backend="json", **kwargs):
+        if backend == "sqlite":
+            from models.sqlite_database import SQLiteDatabase
+            # Not a Database, so Python does not run __init__ on it a second time
+            return SQLiteDatabase(*args, **kwargs)
+        return super().__new__(cls)
+
+    def __init__(self, file_path="data.json", journal=False, compact_every=1000, group_commit=False, lazy=False,
+                 async_writes=False, queue_size=1000, log_path="log.jsonl", lock_stripes=64, backend="json",
+                 snapshot_format="json", read_only=False):
+        # read_only: load (journal included) into memory and never touch the files. Also
+        # forced on when another process already owns the store (see load_from_json)
+        super().__init__(file_path, log_path, lock_stripes, read_only)
+        # "json" or "binary" (models.snapshot) for new files; an existing file keeps its own format
+        self.snapshot_format = snapshot_format
+        self._save_pending = False
+        self.journal = Journal(file_path + ".journal", group_commit=group_commit) if journal and not read_only else None
+        self.compact_every = compact_every
+        self.lazy = lazy
+        self.lock = threading.Lock()
+        # Lock order: account stripes, then state_lock or lock (never both at once,
+        # except lock -> state_lock while a snapshot is taken); writer_lock comes before lock
+        self.state_lock = threading.RLock()
+        # Held for the lifetime of the store: only the owner may fold, compact or reset
+        # the journal, so a second process never deletes files the first one still writes
+        self.owner_lock = FileLock(file_path + ".lock")
+        # Serializes whole snapshot writes (save_to_json, compact); taken before self.lock
+        self.writer_lock = threading.Lock()
+        self._compacting = False
+        self._legacy_money = False
         self.users = {}
         self.accounts = {}
-        self.transactions = {}
+        self.transactions = ColumnarTransactionMap() if lazy else TransactionMap()
+        self.users_by_username = {}
+        self.accounts_by_user = {}
+        self.daily_deposits = {}
+        self.transactions_by_time = SortedIndex()
+        self.account_time_index = {}
+        # Built on the first amount-ordered query (see _amount_indexes)
+        self.transactions_by_amount = None
+        self.account_amount_index = None
         self.load_from_json()
+        if async_writes and not self.read_only:
+            self.worker = PersistenceWorker(queue_size)
 
     def load_from_json(self):
         try:
-            if os.path.exists(self.file_path):
+            journal = self.journal or Journal(self.file_path + ".journal")
+            if not self.read_only and not self.owner_lock.acquire():
+                # Writes from here would be lost: the owner's journal records carry absolute
+                # balances and its next snapshot replaces data.json, so this store only reads
+                self.log_action("Сховище вже відкрите іншим процесом: відкрито лише для читання")
+                self.read_only = True
+                self.journal = None
+            legacy = False
+            if is_binary_snapshot(self.file_path):
+                self.snapshot_format = "binary"
+                self._load_binary()
+            elif os.path.exists(self.file_path):
+                self.snapshot_format = "json"
+                # "version" is written first, so anything before it is a legacy float file
+                self._legacy_money = True
                 with open(self.file_path, 'r') as f:
-                    data = json.load(f)
-                    for user_data in data.get("users", []):
-                        self.users[user_data["user_id"]] = User(
-                            user_data["user_id"],
-                            user_data["username"],
-                            user_data["password"],
-                            UserRole(user_data["role"])
-                        )
-                    for account_data in data.get("accounts", []):
-                        self.accounts[account_data["account_id"]] = Account(
-                            account_data["account_id"],
-                            account_data["user_id"],
-                            account_data["balance"],
-                        )
-                        self.accounts[account_data["account_id"]].is_blocked = account_data["is_blocked"]
-                    for transaction_data in data.get("transactions", []):
-                        self.transactions[transaction_data["transaction_id"]] = Transaction(
-                            transaction_data["transaction_id"],
-                            transaction_data["account_id"],
-                            transaction_data["amount"],
-                            transaction_data["transaction_type"],
-                            datetime.fromisoformat(transaction_data["timestamp"])
-                        )
-            else:
+                    for section, item in iter_json_sections(f):
+                        if section == "version":
+                            self._legacy_money = False
+                        else:
+                            self._apply_item(section, item)
+                legacy, self._legacy_money = self._legacy_money, False
+            elif not os.path.exists(journal.path) and not self.read_only:
                 self._init_sample_data()
                 self.save_to_json()
+            replayed = False
+            for record in journal.replay():
+                self._apply_data(record)
+                replayed = True
+            rehashed = self._hash_plaintext_passwords()
+            # Only the owner rewrites the snapshot, with or without a journal of its own
+            if self.owner_lock.held and (legacy or rehashed or os.path.exists(journal.rotated_path)):
+                # Fold an interrupted compaction, a legacy file or migrated passwords
+                # into a fresh snapshot
+                self.save_to_json()
         except Exception as e:
             self.log_action(f"Помилка завантаження JSON: {str(e)}")
+        self._rebuild_indexes()
+
+    def _load_binary(self):
+        with SnapshotReader(self.file_path) as reader:
+            if reader.data_version > SNAPSHOT_VERSION:
+                raise ValueError(f"невідома версія даних {reader.data_version}")
+            for user in reader.users():
+                self.users[user.user_id] = user
+            for account in reader.accounts():
+                self.accounts[account.account_id] = account
+            if self.lazy:
+                self.transactions = ColumnarTransactionMap.from_columns(reader.ids(), *reader.columns())
+            else:
+                for record in reader.records():
+                    self.transactions.add_record(record)
+
+    def _hash_plaintext_passwords(self):
+        # Files written before hashing keep plaintext passwords; hash them once, on the pool
+        users = [user for user in self.users.values() if not is_hashed(user.password)]
+        for user, hashed in zip(users, self.passwords.hash_many(user.password for user in users)):
+            user.password = hashed
+        return len(users)
+
+    def _apply_data(self, data):
+        for section in ("users", "accounts", "transactions"):
+            for item in data.get(section, []):
+                self._apply_item(section, item)
+
+    def _apply_item(self, section, item):
+        if self._legacy_money:
+            item = migrate_item(section, item)
+        if section == "users":
+            self.users[item["user_id"]] = User.from_dict(item)
+        elif section == "accounts":
+            self.accounts[item["account_id"]] = Account.from_dict(item)
+        elif section == "transactions":
+            if self.lazy:
+                self.transactions.add_record((
+                    item["transaction_id"],
+                    item["account_id"],
+                    item["amount"],
+                    item["transaction_type"],
+                    item["timestamp"]
+                ))
+            else:
+                self.transactions[item["transaction_id"]] = Transaction.from_dict(item)
+
+    def _rebuild_indexes(self):
+        self.users_by_username = {}
+        self.accounts_by_user = {}
+        self.daily_deposits = {}
+        for user in self.users.values():
+            self.users_by_username[user.username] = user
+        for account in self.accounts.values():
+            self.accounts_by_user.setdefault(account.user_id, []).append(account)
+        # Indexes hold refs into self.transactions (row numbers for the columnar store),
+        # in flat arrays; afterwards _index_order keeps them sorted on every insert
+        columns = self.transactions.index_columns()
+        self.transactions_by_time, self.account_time_index = build_indexes(
+            columns, columns[5], self.transactions.REF_TYPECODE, Ledger)
+        self.transactions_by_amount = None
+        self.account_amount_index = None
+        # Only today's (and any later) deposits count towards the daily limit
+        today = timestamp_key(datetime.combine(datetime.now().date(), datetime.min.time()))
+        index = self.transactions_by_time
+        for position in range(bisect_left(index.keys, today), len(index)):
+            self._count_deposit(self.transactions.at(index.refs[position]).to_record())
+
+    def _amount_indexes(self):
+        # Amount order is asked for far less often than time order, so these two are
+        # only built (from the current state) the first time someone needs them
+        with self.state_lock:
+            if self.transactions_by_amount is None:
+                columns = self.transactions.index_columns()
+                self.transactions_by_amount, self.account_amount_index = build_indexes(
+                    columns, columns[4], self.transactions.REF_TYPECODE)
+            return self.transactions_by_amount, self.account_amount_index
+
+    def _index_order(self, record, ref, insert=True):
+        time_key = timestamp_key(record[4])
+        indexes = [
+            (self.account_time_index.setdefault(record[1], Ledger(self.transactions.REF_TYPECODE)), time_key),
+            (self.transactions_by_time, time_key)
+        ]
+        if self.transactions_by_amount is not None:
+            indexes.append((self.transactions_by_amount, record[2]))
+            indexes.append((self.account_amount_index.setdefault(record[1], SortedIndex(self.transactions.REF_TYPECODE)), record[2]))
+        for index, key in indexes:
+            if insert:
+                index.insert(key, ref, record[2])
+            else:
+                index.remove(key, ref)
+
+    def _count_deposit(self, record, sign=1):
+        if record[3] != "deposit":
+            return
+        account = self.accounts.get(record[1])
+        # Only today's totals matter for the limit; older days are never looked up again
+        if account is None or record[4][:10] < datetime.now().date().isoformat():
+            return
+        key = (account.user_id, date.fromisoformat(record[4][:10]))
+        self.daily_deposits[key] = self.daily_deposits.get(key, 0) + sign * record[2]
+
+    def _prune_daily_deposits(self, today):
+        for key in [key for key in self.daily_deposits if key[1] < today]:
+            del self.daily_deposits[key]
+
+    def _put_user(self, user):
+        self.users[user.user_id] = user
+        self.users_by_username[user.username] = user
+
+    def _put_account(self, account):
+        self.accounts[account.account_id] = account
+        self.accounts_by_user.setdefault(account.user_id, []).append(account)
+
+    def _put_transaction(self, transaction):
+        old = self.transactions.record(transaction.transaction_id)
+        if old is not None:
+            self._count_deposit(old, -1)
+            self._index_order(old, self.transactions.ref(old[0]), insert=False)
+        self.transactions[transaction.transaction_id] = transaction
+        record = transaction.to_record()
+        self._count_deposit(record)
+        self._index_order(record, self.transactions.ref(transaction.transaction_id))
+
+    def _drop_transaction(self, transaction):
+        record = transaction.to_record()
+        self._index_order(record, self.transactions.ref(transaction.transaction_id), insert=False)
+        self._count_deposit(record, -1)
+        del self.transactions[transaction.transaction_id]
+
+    def _snapshot(self, snapshot_format=None):
+        with self.state_lock:
+            if (snapshot_format or self.snapshot_format) == "binary":
+                return capture(self)
+            return {
+                "version": SNAPSHOT_VERSION,
+                "users": [user.to_dict() for user in list(self.users.values())],
+                "accounts": [account.to_dict() for account in list(self.accounts.values())],
+                "transactions": [Transaction.record_to_dict(record) for record in self.transactions.records()]
+            }
+
+    def _write_snapshot(self, data, path=None):
+        path = path or self.file_path
+        directory = os.path.dirname(os.path.abspath(path))
+        # A unique temporary name per write, synced before it replaces the snapshot and
+        # before any journal that the snapshot supersedes is deleted
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w" if isinstance(data, dict) else "wb") as f:
+                if isinstance(data, dict):
+                    json.dump(data, f, indent=4)
+                else:
+                    write_snapshot(f, data, SNAPSHOT_VERSION)
+                f.flush()
+                os.fsync(f.fileno())
+            # mkstemp creates the file as 0600; keep the snapshot's own permissions instead
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode) if os.path.exists(path) else 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        _fsync_directory(directory)
+        if metrics.enabled:
+            metrics.add("snapshot_writes")
+            metrics.add("snapshot_bytes", os.path.getsize(path))
+
+    def write_snapshot(self, path, snapshot_format="json"):
+        # A standalone copy of the current state in either format; the journal is untouched
+        self._write_snapshot(self._snapshot(snapshot_format), path)
 
     def save_to_json(self):
+        if self.read_only:
+            return False
         try:
-            data = {
-                "users": [
-                    {
-                        "user_id": user.user_id,
-                        "username": user.username,
-                        "password": user.password,
-                        "role": user.role.value
-                    } for user in self.users.values()
-                ],
-                "accounts": [
-                    {
-                        "account_id": account.account_id,
-                        "user_id": account.user_id,
-                        "balance": account.balance,
-                        "is_blocked": account.is_blocked
-                    } for account in self.accounts.values()
-                ],
-                "transactions": [
-                    {
-                        "transaction_id": transaction.transaction_id,
-                        "account_id": transaction.account_id,
-                        "amount": transaction.amount,
-                        "transaction_type": transaction.transaction_type,
-                        "timestamp": transaction.timestamp.isoformat()
-                    } for transaction in self.transactions.values()
-                ]
-            }
-            with open(self.file_path, 'w') as f:
-                json.dump(data, f, indent=4)
+            with self.writer_lock, self.lock:
+                self._write_snapshot(self._snapshot())
+                # The snapshot includes everything replayed at load, so the journal can go.
+                # Only the owner gets here: every other store is read-only
+                (self.journal or Journal(self.file_path + ".journal")).reset()
+            return True
         except Exception as e:
             self.log_action(f"Помилка збереження JSON: {str(e)}")
+            return False
+
+    def _commit(self, users=(), accounts=(), transactions=()):
+        if self.read_only:
+            return False
+        record = None
+        if self.journal is not None:
+            # Serialized here so the record reflects the state at commit time,
+            # even if the write itself happens later on the worker thread
+            record = {}
+            if users:
+                record["users"] = [user.to_dict() for user in users]
+            if accounts:
+                record["accounts"] = [account.to_dict() for account in accounts]
+            if transactions:
+                record["transactions"] = [transaction.to_dict() for transaction in transactions]
+        if self.worker is None:
+            return self._persist(record)
+        if record is None:
+            # Full snapshots are coalesced: one pending save covers every change before it runs
+            if self._save_pending:
+                return True
+            self._save_pending = True
+        self.worker.submit(partial(self._persist, record))
+        return True
+
+    def _persist(self, record):
+        if record is None:
+            self._save_pending = False
+            return self.save_to_json()
+        try:
+            with self.lock:
+                seq = self.journal.append(record)
+                if self.journal.records >= self.compact_every and not self._compacting:
+                    self._compacting = True
+                    threading.Thread(target=self.compact, daemon=True).start()
+            if self.journal.group_commit:
+                self.journal.sync(seq)
+            return True
+        except Exception as e:
+            self.log_action(f"Помилка запису журналу: {str(e)}")
+            return False
+
+    def compact(self):
+        try:
+            # One snapshot writer at a time: save_to_json resets the journal, so it must not
+            # run between this rotation and the discard of the rotated file
+            with self.writer_lock:
+                with self.lock:
+                    # A .compacting left by a failed compaction is still needed; it is
+                    # superseded by this snapshot too, so it is kept rather than overwritten
+                    if not os.path.exists(self.journal.rotated_path):
+                        self.journal.rotate()
+                # Records appended after the rotation are replayed on top of this snapshot,
+                # so it may be taken without holding the lock
+                self._write_snapshot(self._snapshot())
+                self.journal.discard_rotated()
+        except Exception as e:
+            self.log_action(f"Помилка компактування журналу: {str(e)}")
+        finally:
+            self._compacting = False
+
+    def close(self):
+        if self.worker is not None:
+            worker, self.worker = self.worker, None
+            worker.close()
+        if self.journal is not None:
+            with self.lock:
+                self.journal.close()
+        self.owner_lock.release()
+        super().close()
 
     def _init_sample_data(self):
-        self.users["u1"] = User("u1", "client1", "pass123", UserRole.CLIENT)
-        self.users["u2"] = User("u2", "employee1", "pass456", UserRole.EMPLOYEE)
-        self.accounts["a1"] = Account("a1", "u1", 1000.0)
-        self.transactions["t1"] = Transaction("t1", "a1", 100.0, "deposit")
+        self.users["u1"] = User("u1", "client1", self.passwords.hash("pass123"), UserRole.CLIENT)
+        self.users["u2"] = User("u2", "employee1", self.passwords.hash("pass456"), UserRole.EMPLOYEE)
+        self.accounts["a1"] = Account("a1", "u1", to_minor(1000))
+        self.transactions["t1"] = Transaction("t1", "a1", to_minor(100), "deposit")
 
     def register_user(self, username, password, role):
-        for user in self.users.values():
-            if user.username == username:
-                return False, "Ім'я користувача вже існує"
-        user_id = generate_id()
-        self.users[user_id] = User(user_id, username, password, role)
-        if role == UserRole.CLIENT:
-            account_id = generate_id()
-            self.accounts[account_id] = Account(account_id, user_id, 0.0)
-        self.save_to_json()
+        if username in self.users_by_username:
+            return False, "Ім'я користувача вже існує"
+        # Hashed before taking any lock; the name is checked again under the lock
+        hashed = self.passwords.hash(password)
+        with self.account_locks.hold(username):
+            with self.state_lock:
+                if username in self.users_by_username:
+                    return False, "Ім'я користувача вже існує"
+                user = User(generate_id(), username, hashed, role)
+                self._put_user(user)
+                accounts = []
+                if role == UserRole.CLIENT:
+                    accounts.append(Account(generate_id(), user.user_id))
+                    self._put_account(accounts[0])
+            self._commit(users=[user], accounts=accounts)
         return True, "Реєстрація успішна"
 
-    def get_user(self, username, password):
-        for user in self.users.values():
-            if user.username == username and user.password == password:
-                return user
-        return None
-
     def get_user_by_username(self, username):
-        for user in self.users.values():
-            if user.username == username:
-                return user
-        return None
+        return self.users_by_username.get(username)
+
+    def get_user_by_id(self, user_id):
+        return self.users.get(user_id)
 
     def get_account(self, account_id):
         return self.accounts.get(account_id)
 
     def get_user_accounts(self, user_id):
-        return [account for account in self.accounts.values() if account.user_id == user_id]
+        return list(self.accounts_by_user.get(user_id, []))
 
     def create_account(self, user_id, account_id):
-        self.accounts[account_id] = Account(account_id, user_id, 0.0)
-        self.save_to_json()
+        account = Account(account_id, user_id)
+        with self.account_locks.hold(account_id):
+            with self.state_lock:
+                self._put_account(account)
+            self._commit(accounts=[account])
+
+    def bulk_load(self, users=(), accounts=(), transactions=(), commit=False):
+        # Bulk import path: no per-row index upkeep; finish_bulk_load() rebuilds the
+        # indexes once. transactions are raw storage records
+        with self.state_lock:
+            for user in users:
+                self.users[user.user_id] = user
+            for account in accounts:
+                self.accounts[account.account_id] = account
+            for record in transactions:
+                self.transactions.add_record(record)
+        if not commit:
+            return True
+        return self._commit(users, accounts, [Transaction.from_record(record) for record in transactions])
+
+    def finish_bulk_load(self):
+        with self.state_lock:
+            self._rebuild_indexes()
+        return self.save_to_json()
 
     def add_transaction(self, transaction):
-        self.transactions[transaction.transaction_id] = transaction
-        self.save_to_json()
+        # Held through the commit so journal records of one account stay in the order they happened
+        with self.account_locks.hold(transaction.account_id):
+            with self.state_lock:
+                self._put_transaction(transaction)
+                account = self.accounts.get(transaction.account_id)
+            # The caller has already adjusted the balance, so journal the account state alongside
+            self._commit(accounts=[account] if account else (), transactions=[transaction])
+
+    def transfer(self, source, target, amount):
+        # The balance check, both legs and the commit happen under both account locks,
+        # so concurrent transfers out of one account cannot spend the same money twice
+        with self.account_locks.hold(source.account_id, target.account_id):
+            if source.is_blocked or target.is_blocked:
+                return False, "Рахунок заблоковано"
+            if amount <= 0 or amount > source.balance:
+                return False, "Невірна сума"
+            debit = Transaction(generate_id(), source.account_id, -amount, "transfer")
+            credit = Transaction(generate_id(), target.account_id, amount, "transfer")
+            with self.state_lock:
+                source.balance -= amount
+                target.balance += amount
+                self._put_transaction(debit)
+                self._put_transaction(credit)
+            # Both legs go out as a single journal record (or a single snapshot write)
+            if not self._commit(accounts=[source, target], transactions=[debit, credit]):
+                with self.state_lock:
+                    source.balance += amount
+                    target.balance -= amount
+                    self._drop_transaction(debit)
+                    self._drop_transaction(credit)
+                return False, "Помилка збереження переказу"
+        return True, "Переказ успішний"
+
+    def pay_bill(self, account, amount):
+        with self.account_locks.hold(account.account_id):
+            if account.is_blocked:
+                return False, "Рахунок заблоковано"
+            if amount <= 0 or amount > account.balance:
+                return False, "Невірна сума"
+            payment = Transaction(generate_id(), account.account_id, -amount, "bill_payment")
+            with self.state_lock:
+                account.balance -= amount
+                self._put_transaction(payment)
+            if not self._commit(accounts=[account], transactions=[payment]):
+                with self.state_lock:
+                    account.balance += amount
+                    self._drop_transaction(payment)
+                return False, "Помилка збереження платежу"
+        return True, "Рахунок оплачено успішно"
 
     def get_account_transactions(self, account_id):
-        return [t for t in self.transactions.values() if t.account_id == account_id]
+        # In time order, like the SQLite backend
+        with self.state_lock:
+            ledger = self.account_time_index.get(account_id)
+            return [self.transactions.at(ref) for ref in ledger.refs] if ledger is not None else []
 
-    def block_account(self, account_id):
-        if account_id in self.accounts:
-            self.accounts[account_id].is_blocked = True
-            self.save_to_json()
+    def get_sorted_transactions(self, sort_key, account_id=None):
+        field, direction = sort_key.split("_")
+        if field == "date":
+            overall, by_account = self.transactions_by_time, self.account_time_index
+        else:
+            overall, by_account = self._amount_indexes()
+        index = overall if account_id is None else by_account.get(account_id, SortedIndex())
+        return OrderedView(index, self.transactions, reverse=direction == "desc")
 
-    def unblock_account(self, account_id):
-        if account_id in self.accounts:
-            self.accounts[account_id].is_blocked = False
-            self.save_to_json()
+    def _set_blocked(self, account_id, is_blocked):
+        with self.account_locks.hold(account_id):
+            account = self.accounts.get(account_id)
+            if account is not None:
+                account.is_blocked = is_blocked
+                self._commit(accounts=[account])
 
     def get_all_transactions(self):
-        return list(self.transactions.values())
+        with self.state_lock:
+            return list(self.transactions.values())
+
+    def transaction_records(self):
+        return self.transactions.records()
 
     def add_deposit(self, account, amount):
-        user_id = account.user_id
-        today = datetime.now().date()
-        daily_deposits = sum(
-            t.amount for t in self.transactions.values()
-            if t.transaction_type == "deposit" and t.account_id in [a.account_id for a in self.get_user_accounts(user_id)]
-            and t.timestamp.date() == today
-        )
-        if daily_deposits + amount > 100000:
-            return False, "Перевищено денний ліміт депозиту 100,000"
-        account.balance += amount
-        self.save_to_json()
+        # The owner's stripe too: the daily limit is shared by all of a user's accounts
+        with self.account_locks.hold(account.account_id, account.user_id):
+            today = datetime.now().date()
+            deposit = Transaction(generate_id(), account.account_id, amount, "deposit")
+            with self.state_lock:
+                self._prune_daily_deposits(today)
+                daily_deposits = self.daily_deposits.get((account.user_id, today), 0)
+                if daily_deposits + amount > DAILY_DEPOSIT_LIMIT:
+                    return False, "Перевищено денний ліміт депозиту 100,000"
+                account.balance += amount
+                self._put_transaction(deposit)
+            if not self._commit(accounts=[account], transactions=[deposit]):
+                with self.state_lock:
+                    account.balance -= amount
+                    self._drop_transaction(deposit)
+                return False, "Помилка збереження депозиту"
         return True, "Депозит дозволено"
 
-    def export_report(self, total_deposits, total_transfers, total_payments):
-        try:
-            with open("report.txt", "w") as f:
-                f.write(f"Звіт про транзакції ({datetime.now()})\n")
-                f.write("-" * 40 + "\n")
-                f.write(f"Загальні депозити: ${total_deposits:.2f}\n")
-                f.write(f"Загальні перекази: ${total_transfers:.2f}\n")
-                f.write(f"Загальні оплати рахунків: ${total_payments:.2f}\n")
-        except Exception as e:
-            self.log_action(f"Помилка експорту звіту: {str(e)}")
-
-    def log_action(self, action):
-        try:
-            with open(self.log_file, "a") as f:
-                f.write(f"[{datetime.now()}] {action}\n")
-        except Exception as e:
-            pass
\ No newline at end of file
+    def balance_at(self, account_id, when):
+        # Every balance change is a ledger entry, so the balance at `when` is the current
+        # balance minus whatever was posted after it
+        with self.state_lock:
+            account = self.accounts.get(account_id)
+            if account is None:
+                return None
+            ledger = self.account_time_index.get(account_id)
+            if ledger is None:
+                return account.balance
+            return account.balance - ledger.total + ledger.total_through(timestamp_key(when))
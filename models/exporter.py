@@ -0,0 +1,158 @@
+import csv
+import struct
+import sys
+from array import array
+from contextlib import contextmanager
+from datetime import date, datetime
+from itertools import islice
+from models.money import format_money
+from models.storage import EPOCH, MICROSECOND, timestamp_key
+
+CSV_HEADER = ("transaction_id", "account_id", "amount", "transaction_type", "timestamp")
+
+# Columnar file: MAGIC, then row groups of up to chunk_size rows, then a group with
+# 0 rows as the end marker. A group is
+#   <I rows>, account table, type table, id table  (each: <I count> + <H len><utf-8> per entry)
+#   accounts  uint32[rows]  index into the group's account table
+#   amounts   int64[rows]   minor units
+#   times     int64[rows]   microseconds since 1970-01-01
+#   types     uint8[rows]   index into the group's type table
+# All numbers little-endian. Tables are per group, so the writer never holds more than one group
+MAGIC = b"BANKCOL1"
+COLUMN_CODES = ("I", "q", "q", "B")
+
+@contextmanager
+def open_target(target, mode):
+    # Paths are opened (and closed) here; file objects are used as they are
+    if hasattr(target, "write") or hasattr(target, "read"):
+        yield target
+    elif "b" in mode:
+        with open(target, mode) as f:
+            yield f
+    else:
+        with open(target, mode, newline="", encoding="utf-8") as f:
+            yield f
+
+def _bound(value):
+    if value is None:
+        return None
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.min.time())
+    return timestamp_key(value)
+
+def iter_records(database, account_id=None, start=None, end=None):
+    # Raw records in storage order; start is inclusive, end exclusive
+    start, end = _bound(start), _bound(end)
+    for record in database.transaction_records():
+        if account_id is not None and record[1] != account_id:
+            continue
+        if start is not None or end is not None:
+            key = timestamp_key(record[4])
+            if (start is not None and key < start) or (end is not None and key >= end):
+                continue
+        yield record
+
+def _chunks(records, chunk_size):
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def export_csv(database, target, account_id=None, start=None, end=None, chunk_size=10000):
+    count = 0
+    with open_target(target, "w") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        for chunk in _chunks(iter_records(database, account_id, start, end), chunk_size):
+            writer.writerows((record[0], record[1], format_money(record[2]), record[3], record[4]) for record in chunk)
+            count += len(chunk)
+    return count
+
+def _pack_table(values):
+    parts = [struct.pack("<I", len(values))]
+    for value in values:
+        data = value.encode("utf-8")
+        parts.append(struct.pack("<H", len(data)))
+        parts.append(data)
+    return b"".join(parts)
+
+def _code(value, names, codes):
+    code = codes.get(value)
+    if code is None:
+        code = codes[value] = len(names)
+        names.append(value)
+    return code
+
+def _column_bytes(column):
+    if sys.byteorder != "little":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+def export_columnar(database, target, account_id=None, start=None, end=None, chunk_size=65536):
+    count = 0
+    with open_target(target, "wb") as f:
+        f.write(MAGIC)
+        for chunk in _chunks(iter_records(database, account_id, start, end), chunk_size):
+            account_names, account_codes, type_names, type_codes = [], {}, [], {}
+            columns = [array(code) for code in COLUMN_CODES]
+            for record in chunk:
+                columns[0].append(_code(record[1], account_names, account_codes))
+                columns[1].append(record[2])
+                columns[2].append(timestamp_key(record[4]))
+                columns[3].append(_code(record[3], type_names, type_codes))
+            f.write(struct.pack("<I", len(chunk)))
+            f.write(_pack_table(account_names))
+            f.write(_pack_table(type_names))
+            f.write(_pack_table([record[0] for record in chunk]))
+            for column in columns:
+                f.write(_column_bytes(column))
+            count += len(chunk)
+        f.write(struct.pack("<I", 0))
+    return count
+
+def _read_exact(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("Файл експорту пошкоджено")
+    return data
+
+def _read_table(f):
+    (count,) = struct.unpack("<I", _read_exact(f, 4))
+    values = []
+    for _ in range(count):
+        (size,) = struct.unpack("<H", _read_exact(f, 2))
+        values.append(_read_exact(f, size).decode("utf-8"))
+    return values
+
+def read_columnar(source):
+    # Yields one dict per row group: account_ids/type_names tables, ids and the four columns
+    with open_target(source, "rb") as f:
+        if _read_exact(f, len(MAGIC)) != MAGIC:
+            raise ValueError("Невідомий формат файлу")
+        while True:
+            (rows,) = struct.unpack("<I", _read_exact(f, 4))
+            if not rows:
+                return
+            group = {"account_ids": _read_table(f), "type_names": _read_table(f), "ids": _read_table(f)}
+            for name, code in zip(("accounts", "amounts", "timestamps", "types"), COLUMN_CODES):
+                column = array(code)
+                column.frombytes(_read_exact(f, rows * column.itemsize))
+                if sys.byteorder != "little":
+                    column.byteswap()
+                group[name] = column
+            yield group
+
+def read_columnar_records(source):
+    # Back to raw storage records, e.g. to load an export into LedgerSnapshot.from_records
+    for group in read_columnar(source):
+        for row, transaction_id in enumerate(group["ids"]):
+            yield (
+                transaction_id,
+                group["account_ids"][group["accounts"][row]],
+                group["amounts"][row],
+                group["type_names"][group["types"][row]],
+                (EPOCH + group["timestamps"][row] * MICROSECOND).isoformat()
+            )
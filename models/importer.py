@@ -0,0 +1,171 @@
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from models.core import User, Account, UserRole
+from models.money import to_minor
+from models.passwords import is_hashed
+from models.utils import generate_id
+
+KINDS = ("users", "accounts", "transactions")
+TRANSACTION_TYPES = ("deposit", "transfer", "bill_payment")
+MAX_REPORTED_ERRORS = 100
+
+def read_rows(path, kind=None):
+    # Yields (line, kind, row). CSV files hold one kind (from the argument or the file
+    # name, e.g. users.csv); JSONL lines may carry their own "kind"
+    if kind is None and os.path.splitext(os.path.basename(path))[0] in KINDS:
+        kind = os.path.splitext(os.path.basename(path))[0]
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            if kind is None:
+                raise ValueError(f"Невідомий тип даних для {path}")
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                yield line, kind, row
+        else:
+            for line, text in enumerate(f, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    row = json.loads(text)
+                except ValueError:
+                    yield line, kind, None
+                    continue
+                yield line, row.pop("kind", kind) if isinstance(row, dict) else kind, row
+
+# Streams rows into the database in batches. Rows are validated and given ids batch by
+# batch, applied without per-row persistence, and the indexes are rebuilt once in
+# finish(). With commit="batch" every batch is also persisted (one journal record or
+# one SQLite transaction), so an interrupted import keeps what it already loaded;
+# with commit="end" nothing is written until finish().
+# Users and accounts that are already stored (same username, or same account_id) are
+# skipped and counted, never overwritten, so a re-run cannot reset live balances;
+# a row that clashes with a stored user under another id is an error. Transactions
+# with an existing transaction_id replace the stored record. Re-running an import is
+# therefore safe for rows that carry their ids; rows without an account_id or
+# transaction_id get a fresh id and are added again.
+# Transactions are history: they do not change account balances
+class BulkImporter:
+    def __init__(self, database, batch_size=10000, commit="end", progress=None):
+        self.db = database
+        self.batch_size = batch_size
+        self.commit = commit
+        self.progress = progress
+        self.usernames = {}
+        self.user_ids = set()
+        self.account_ids = set()
+        self.batch = {kind: [] for kind in KINDS}
+        self.pending = 0
+        self.rows = 0
+        self.imported = {kind: 0 for kind in KINDS}
+        self.skipped = {kind: 0 for kind in KINDS}
+        self.error_count = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.validators = {"users": self._user, "accounts": self._account, "transactions": self._transaction}
+
+    def _user(self, row):
+        username = (row.get("username") or "").strip()
+        if not username or not username.isalpha():
+            raise ValueError("Ім'я користувача має містити лише літери")
+        if username in self.usernames:
+            raise ValueError(f"Ім'я користувача вже існує: {username}")
+        stored = self.db.get_user_by_username(username)
+        if stored is not None:
+            if row.get("user_id") and row["user_id"] != stored.user_id:
+                raise ValueError(f"Ім'я користувача вже існує: {username}")
+            return None
+        if row.get("user_id") and self.db.get_user_by_id(row["user_id"]) is not None:
+            raise ValueError(f"Ідентифікатор користувача вже зайнятий: {row['user_id']}")
+        password = row.get("password") or ""
+        if not is_hashed(password) and len(password) < 6:
+            raise ValueError("Пароль має містити щонайменше 6 символів")
+        role = UserRole(row.get("role") or "client")
+        user = User(row.get("user_id") or generate_id(), username, password, role)
+        self.usernames[username] = user.user_id
+        self.user_ids.add(user.user_id)
+        return user
+
+    def _account(self, row):
+        user_id = row.get("user_id") or self.usernames.get(row.get("username"))
+        if user_id is None and row.get("username"):
+            user = self.db.get_user_by_username(row["username"])
+            user_id = user.user_id if user else None
+        if not user_id or (user_id not in self.user_ids and self.db.get_user_by_id(user_id) is None):
+            raise ValueError("Власника рахунку не знайдено")
+        account_id = row.get("account_id")
+        if account_id in self.account_ids:
+            raise ValueError(f"Рахунок повторюється: {account_id}")
+        if account_id and self.db.get_account(account_id) is not None:
+            return None
+        account = Account(account_id or generate_id(), user_id, to_minor(row.get("balance") or 0))
+        if account.balance < 0:
+            raise ValueError("Невірна сума")
+        account.is_blocked = str(row.get("is_blocked", "")).lower() in ("1", "true", "yes")
+        self.account_ids.add(account.account_id)
+        return account
+
+    def _transaction(self, row):
+        account_id = row.get("account_id")
+        if not account_id or (account_id not in self.account_ids and self.db.get_account(account_id) is None):
+            raise ValueError("Рахунок не знайдено")
+        transaction_type = row.get("transaction_type")
+        if transaction_type not in TRANSACTION_TYPES:
+            raise ValueError(f"Невідомий тип транзакції: {transaction_type}")
+        timestamp = datetime.fromisoformat(row["timestamp"]) if row.get("timestamp") else datetime.now()
+        if timestamp.tzinfo is not None:
+            # Stored times are naive local time, like datetime.now()
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
+        amount = to_minor(row.get("amount"))
+        # Raw storage record, the same shape TransactionMap keeps
+        return (row.get("transaction_id") or generate_id(), account_id, amount, transaction_type, timestamp.isoformat())
+
+    def add(self, line, kind, row):
+        self.rows += 1
+        try:
+            if kind not in KINDS or not isinstance(row, dict):
+                raise ValueError("Невірний рядок")
+            item = self.validators[kind](row)
+        except (KeyError, TypeError, ValueError) as e:
+            self.error_count += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append((line, kind, str(e)))
+            return
+        if item is None:
+            self.skipped[kind] += 1
+            return
+        self.batch[kind].append(item)
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def import_file(self, path, kind=None):
+        for line, row_kind, row in read_rows(path, kind):
+            self.add(f"{os.path.basename(path)}:{line}", row_kind, row)
+
+    def flush(self):
+        if not self.pending:
+            return
+        users = self.batch["users"]
+        plaintext = [user for user in users if not is_hashed(user.password)]
+        for user, hashed in zip(plaintext, self.db.passwords.hash_many(user.password for user in plaintext)):
+            user.password = hashed
+        if not self.db.bulk_load(users, self.batch["accounts"], self.batch["transactions"], commit=self.commit == "batch"):
+            raise OSError("Помилка збереження пакета")
+        for kind in KINDS:
+            self.imported[kind] += len(self.batch[kind])
+        self.batch = {kind: [] for kind in KINDS}
+        self.pending = 0
+        if self.progress is not None:
+            self.progress(self)
+
+    def finish(self):
+        self.flush()
+        if not self.db.finish_bulk_load():
+            raise OSError("Помилка збереження даних")
+        return self
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.rows / elapsed if elapsed > 0 else 0.0
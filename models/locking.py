@@ -0,0 +1,77 @@
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# A fixed pool of locks shared by all accounts: a key always maps to the same
+# stripe, so memory stays constant however many accounts exist, at the cost of
+# unrelated keys occasionally sharing a lock
+class LockStripes:
+    def __init__(self, count=64):
+        self.locks = [threading.Lock() for _ in range(count)]
+
+    def stripe(self, key):
+        return hash(key) % len(self.locks)
+
+    @contextmanager
+    def hold(self, *keys):
+        # Stripes are always taken in ascending order, so two transfers in opposite
+        # directions cannot each hold one lock while waiting for the other
+        stripes = sorted({self.stripe(key) for key in keys})
+        acquired = []
+        try:
+            for stripe in stripes:
+                self.locks[stripe].acquire()
+                acquired.append(stripe)
+            yield
+        finally:
+            for stripe in reversed(acquired):
+                self.locks[stripe].release()
+
+# An exclusive, non-blocking lock on a side file (flock on POSIX, a locked byte on
+# Windows), so at most one process at a time owns a store. The OS drops it when the
+# holder exits, even after a crash
+class FileLock:
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    @property
+    def held(self):
+        return self.file is not None
+
+    def acquire(self):
+        # False when another process (or another open store in this one) holds it, or
+        # when the lock file cannot be opened at all
+        if self.file is not None:
+            return True
+        try:
+            f = open(self.path, "a+")
+        except OSError:
+            return False
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        self.file = f
+        return True
+
+    def release(self):
+        if self.file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.file.close()
+        self.file = None
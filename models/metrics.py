@@ -0,0 +1,184 @@
+import functools
+import os
+import threading
+import time
+from datetime import datetime
+
+# Opt-in instrumentation. Nothing is wrapped until instrument() is called, so with
+# metrics disabled the only cost left is the `metrics.enabled` check at the few
+# places that count bytes. Latencies go into log-linear histograms (four buckets
+# per power of two of nanoseconds, so percentiles are within about 12%).
+SUB_BUCKETS = 4
+QUANTILES = (0.5, 0.95, 0.99)
+
+class Histogram:
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value):
+        power = value.bit_length()
+        sub = (value >> (power - 3)) & (SUB_BUCKETS - 1) if power > 3 else 0
+        bucket = power * SUB_BUCKETS + sub
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @staticmethod
+    def _upper(bucket):
+        power, sub = divmod(bucket, SUB_BUCKETS)
+        if power <= 3:
+            return 1 << power
+        return (SUB_BUCKETS + sub + 1) << (power - 3)
+
+    def quantile(self, q):
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self._upper(bucket), self.max)
+        return self.max
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.started = time.time()
+        self.profiler = None
+
+    def enable(self):
+        self.enabled = True
+
+    def observe(self, name, nanoseconds):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record(nanoseconds)
+
+    def add(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def timed(self, name, function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.observe(name, time.perf_counter_ns() - started)
+        return wrapper
+
+    def instrument(self, obj, prefix, names=None):
+        # Replaces the object's public methods (or just `names`) with timed wrappers on
+        # the instance itself; the class and other instances are left alone
+        if not self.enabled:
+            return obj
+        if names is None:
+            names = [name for name in dir(type(obj)) if not name.startswith("_") and callable(getattr(type(obj), name))]
+        for name in names:
+            method = getattr(obj, name, None)
+            if callable(method):
+                setattr(obj, name, self.timed(f"{prefix}.{name}", method))
+        return obj
+
+    def render(self):
+        # Prometheus text exposition format
+        with self.lock:
+            histograms = {name: (h.count, h.total, h.max, [h.quantile(q) for q in QUANTILES]) for name, h in self.histograms.items()}
+            counters = dict(self.counters)
+        lines = [f"# bank metrics {datetime.now().isoformat()}, uptime {time.time() - self.started:.0f} s",
+                 "# TYPE bank_call_seconds summary"]
+        for name in sorted(histograms):
+            count, total, maximum, quantiles = histograms[name]
+            for q, value in zip(QUANTILES, quantiles):
+                lines.append(f'bank_call_seconds{{op="{name}",quantile="{q}"}} {value / 1e9:.9f}')
+            lines.append(f'bank_call_seconds_max{{op="{name}"}} {maximum / 1e9:.9f}')
+            lines.append(f'bank_call_seconds_sum{{op="{name}"}} {total / 1e9:.9f}')
+            lines.append(f'bank_call_seconds_count{{op="{name}"}} {count}')
+        lines.append("# TYPE bank_total counter")
+        for name in sorted(counters):
+            lines.append(f'bank_total{{name="{name}"}} {counters[name]}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def start_dump(self, path, interval=10.0):
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.dump(path)
+                except OSError:
+                    pass
+        threading.Thread(target=run, name="metrics-dump", daemon=True).start()
+
+    def serve(self, port, host="127.0.0.1"):
+        # GET /metrics (or any path) on a local port, from a daemon thread
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+    def start_profile(self):
+        # cProfile only sees the thread that enables it: call this from the thread to
+        # be profiled (the Tk or asyncio loop) and stop_profile() from the same thread
+        import cProfile
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def stop_profile(self, path):
+        profiler, self.profiler = self.profiler, None
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(path)
+
+    def configure_from_env(self, schedule=None):
+        # BANK_METRICS=1 turns instrumentation on; BANK_METRICS_DUMP=path (every
+        # BANK_METRICS_INTERVAL seconds) and BANK_METRICS_PORT=port expose it.
+        # BANK_PROFILE=seconds profiles the first seconds into BANK_PROFILE_PATH, given
+        # a schedule(delay_seconds, callback) that runs callbacks on the profiled thread
+        env = os.environ
+        if env.get("BANK_METRICS") not in (None, "", "0"):
+            self.enable()
+            if env.get("BANK_METRICS_DUMP"):
+                self.start_dump(env["BANK_METRICS_DUMP"], float(env.get("BANK_METRICS_INTERVAL", 10)))
+            if env.get("BANK_METRICS_PORT"):
+                self.serve(int(env["BANK_METRICS_PORT"]))
+        if env.get("BANK_PROFILE") and schedule is not None:
+            path = env.get("BANK_PROFILE_PATH", "profile.out")
+            self.start_profile()
+            schedule(float(env["BANK_PROFILE"]), lambda: self.stop_profile(path))
+        return self.enabled
+
+metrics = Metrics()
@@ -0,0 +1,37 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+
+# Balances and amounts are plain ints counting kopecks/cents
+MINOR_UNITS = 100
+MONEY_FIELDS = {"accounts": "balance", "transactions": "amount"}
+# Amounts are stored in int64 columns (storage, binary snapshots)
+MAX_MINOR = 2 ** 63 - 1
+
+def to_minor(value, strict=True):
+    if isinstance(value, float):
+        value = repr(value)
+    try:
+        amount = Decimal(str(value).strip()) * MINOR_UNITS
+    except InvalidOperation:
+        raise ValueError(f"Невірна сума: {value}")
+    if not amount.is_finite():
+        raise ValueError(f"Невірна сума: {value}")
+    integral = amount.to_integral_value(rounding=ROUND_HALF_EVEN)
+    if strict and integral != amount:
+        raise ValueError(f"Забагато знаків після коми: {value}")
+    if abs(integral) > MAX_MINOR:
+        raise ValueError(f"Сума завелика: {value}")
+    return int(integral)
+
+def format_money(minor):
+    sign = "-" if minor < 0 else ""
+    units, cents = divmod(abs(minor), MINOR_UNITS)
+    return f"{sign}{units}.{cents:02d}"
+
+def migrate_item(section, item):
+    # Files written before the switch to minor units stored float major units
+    field = MONEY_FIELDS.get(section)
+    if field is None:
+        return item
+    item = dict(item)
+    item[field] = to_minor(item[field], strict=False)
+    return item
@@ -0,0 +1,108 @@
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Stored form: "scrypt$n$r$p$salt$hash" (or "pbkdf2_sha256$iterations$salt$hash" where
+# hashlib has no scrypt), salt and hash in base64. Anything else is a legacy plaintext password
+SCRYPT_N = 1 << 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600000
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+def _derive(password, scheme, params, salt):
+    if scheme == "scrypt":
+        n, r, p = params
+        return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                              maxmem=128 * n * r * 2, dklen=HASH_BYTES)
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, params[0], dklen=HASH_BYTES)
+
+def is_hashed(stored):
+    return stored.startswith(("scrypt$", "pbkdf2_sha256$"))
+
+def hash_password(password, salt=None):
+    # salt is only passed explicitly for reproducible fixtures
+    salt = os.urandom(SALT_BYTES) if salt is None else salt
+    if hasattr(hashlib, "scrypt"):
+        params = (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+        scheme = "scrypt"
+    else:
+        params = (PBKDF2_ITERATIONS,)
+        scheme = "pbkdf2_sha256"
+    digest = _derive(password, scheme, params, salt)
+    return "$".join([scheme, *map(str, params), _b64(salt), _b64(digest)])
+
+def verify_password(password, stored):
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    scheme, *fields = stored.split("$")
+    params = tuple(int(field) for field in fields[:-2])
+    salt, digest = base64.b64decode(fields[-2]), base64.b64decode(fields[-1])
+    return hmac.compare_digest(_derive(password, scheme, params, salt), digest)
+
+# Runs the slow hashing on a small pool, so a burst of logins uses at most `workers`
+# cores (hashlib releases the GIL while it works) and the rest of the app keeps running.
+# A successful check is remembered for `ttl` seconds as a cheap keyed digest of the
+# password, so repeated logins within that window skip the slow hash entirely
+class PasswordHasher:
+    def __init__(self, workers=2, cache_size=1024, ttl=300):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.cache_secret = os.urandom(32)
+
+    def _cache_key(self, password, stored):
+        # The HMAC key never leaves this process, so a cached digest is no shortcut to the
+        # password even for someone who has read the stored hashes. The stored hash is part
+        # of the message: when the password changes, old entries simply stop matching
+        message = stored.encode("utf-8") + b"\0" + password.encode("utf-8")
+        return hmac.new(self.cache_secret, message, hashlib.sha256).digest()
+
+    def _cached(self, stored, key):
+        with self.lock:
+            entry = self.cache.get(stored)
+            if entry is None:
+                return False
+            if entry[1] < time.monotonic():
+                del self.cache[stored]
+                return False
+            self.cache.move_to_end(stored)
+            return hmac.compare_digest(entry[0], key)
+
+    def _remember(self, stored, key):
+        with self.lock:
+            self.cache[stored] = (key, time.monotonic() + self.ttl)
+            self.cache.move_to_end(stored)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def verify(self, password, stored):
+        if not is_hashed(stored):
+            return verify_password(password, stored)
+        key = self._cache_key(password, stored)
+        if self._cached(stored, key):
+            return True
+        if not self.pool.submit(verify_password, password, stored).result():
+            return False
+        self._remember(stored, key)
+        return True
+
+    def hash(self, password):
+        return self.pool.submit(hash_password, password).result()
+
+    def hash_many(self, passwords):
+        return list(self.pool.map(hash_password, passwords))
+
+    def close(self):
+        self.pool.shutdown(wait=True)
@@ -0,0 +1,58 @@
+import queue
+import threading
+
+# Runs disk writes on a single background thread, in submission order.
+# Callbacks are not called on the worker thread: they are queued and run by
+# dispatch_acks(), which the GUI polls from the Tk loop with root.after
+class PersistenceWorker:
+    def __init__(self, maxsize=1000):
+        self.jobs = queue.Queue(maxsize)
+        self.acks = queue.SimpleQueue()
+        self.failed = False
+        self.thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+        self.thread.start()
+
+    def submit(self, job, callback=None):
+        # Blocks when the queue is full, which throttles callers instead of growing without bound
+        self.jobs.put((job, callback))
+
+    def barrier(self, callback):
+        self.submit(self._barrier, callback)
+
+    def _barrier(self):
+        ok = not self.failed
+        self.failed = False
+        return ok
+
+    def _run(self):
+        while True:
+            item = self.jobs.get()
+            if item is None:
+                self.jobs.task_done()
+                return
+            job, callback = item
+            try:
+                result = job()
+            except Exception:
+                result = False
+            if result is False:
+                self.failed = True
+            if callback is not None:
+                self.acks.put((callback, result))
+            self.jobs.task_done()
+
+    def dispatch_acks(self):
+        while True:
+            try:
+                callback, result = self.acks.get_nowait()
+            except queue.Empty:
+                return
+            callback(result)
+
+    def flush(self):
+        self.jobs.join()
+
+    def close(self):
+        self.jobs.put(None)
+        self.thread.join()
+        self.dispatch_acks()
@@ -0,0 +1,148 @@
+from datetime import timedelta
+from models.storage import ColumnarTransactionMap, EPOCH, MICROSECOND
+
+# numpy takes longer to import than the rest of the app together, so it is loaded
+# with the first report rather than at startup. False: not tried yet, None: missing
+np = False
+
+def load_numpy():
+    global np
+    if np is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+    return np
+
+DAY = 86400 * 1000000
+
+class LedgerSnapshot:
+    def __init__(self, account_ids, type_names, accounts, amounts, timestamps, types):
+        self.account_ids = account_ids
+        self.type_names = type_names
+        self.accounts = accounts
+        self.amounts = amounts
+        self.timestamps = timestamps
+        self.types = types
+
+    def __len__(self):
+        return len(self.amounts)
+
+    @classmethod
+    def from_records(cls, records):
+        transactions = ColumnarTransactionMap()
+        for record in records:
+            transactions.add_record(record)
+        return cls(*transactions.columns())
+
+    @classmethod
+    def from_database(cls, database):
+        transactions = getattr(database, "transactions", None)
+        if isinstance(transactions, ColumnarTransactionMap):
+            return cls(*transactions.columns())
+        return cls.from_records(database.transaction_records())
+
+def _micros(value):
+    return None if value is None else (value - EPOCH) // MICROSECOND
+
+def _empty_report(snapshot):
+    return {
+        "count": 0,
+        "total": 0,
+        "by_type": {name: {"count": 0, "total": 0, "credit": 0, "debit": 0} for name in snapshot.type_names},
+        "by_account": {},
+        "by_day": {}
+    }
+
+def _day(day_number):
+    return (EPOCH + timedelta(days=day_number)).date()
+
+def _report_numpy(snapshot, start, end):
+    accounts = np.frombuffer(snapshot.accounts, dtype=f"u{snapshot.accounts.itemsize}")
+    amounts = np.frombuffer(snapshot.amounts, dtype=np.int64)
+    timestamps = np.frombuffer(snapshot.timestamps, dtype=np.int64)
+    types = np.frombuffer(snapshot.types, dtype=np.uint8)
+    if start is not None or end is not None:
+        mask = np.ones(len(amounts), dtype=bool)
+        if start is not None:
+            mask &= timestamps >= start
+        if end is not None:
+            mask &= timestamps < end
+        accounts, amounts, timestamps, types = accounts[mask], amounts[mask], timestamps[mask], types[mask]
+    report = _empty_report(snapshot)
+    report["count"] = int(len(amounts))
+    report["total"] = int(amounts.sum())
+    # np.add.at keeps int64 sums exact, unlike bincount weights which go through float64
+    credits = np.where(amounts > 0, amounts, 0)
+    type_counts = np.bincount(types, minlength=len(snapshot.type_names))
+    type_totals = np.zeros(len(snapshot.type_names), dtype=np.int64)
+    type_credits = np.zeros(len(snapshot.type_names), dtype=np.int64)
+    np.add.at(type_totals, types, amounts)
+    np.add.at(type_credits, types, credits)
+    for code, name in enumerate(snapshot.type_names):
+        report["by_type"][name] = {
+            "count": int(type_counts[code]),
+            "total": int(type_totals[code]),
+            "credit": int(type_credits[code]),
+            "debit": int(type_totals[code] - type_credits[code])
+        }
+    account_counts = np.bincount(accounts, minlength=len(snapshot.account_ids))
+    account_totals = np.zeros(len(snapshot.account_ids), dtype=np.int64)
+    np.add.at(account_totals, accounts, amounts)
+    for code in np.flatnonzero(account_counts):
+        report["by_account"][snapshot.account_ids[code]] = {"count": int(account_counts[code]), "total": int(account_totals[code])}
+    days, day_codes = np.unique(timestamps // DAY, return_inverse=True)
+    day_counts = np.bincount(day_codes, minlength=len(days))
+    day_totals = np.zeros(len(days), dtype=np.int64)
+    np.add.at(day_totals, day_codes, amounts)
+    for code, day_number in enumerate(days):
+        report["by_day"][_day(int(day_number))] = {"count": int(day_counts[code]), "total": int(day_totals[code])}
+    return report
+
+def _report_python(snapshot, start, end):
+    report = _empty_report(snapshot)
+    type_counts = [0] * len(snapshot.type_names)
+    type_totals = [0] * len(snapshot.type_names)
+    type_credits = [0] * len(snapshot.type_names)
+    account_counts = {}
+    account_totals = {}
+    day_counts = {}
+    day_totals = {}
+    for account, amount, timestamp, type_code in zip(snapshot.accounts, snapshot.amounts, snapshot.timestamps, snapshot.types):
+        if (start is not None and timestamp < start) or (end is not None and timestamp >= end):
+            continue
+        type_counts[type_code] += 1
+        type_totals[type_code] += amount
+        if amount > 0:
+            type_credits[type_code] += amount
+        account_counts[account] = account_counts.get(account, 0) + 1
+        account_totals[account] = account_totals.get(account, 0) + amount
+        day = timestamp // DAY
+        day_counts[day] = day_counts.get(day, 0) + 1
+        day_totals[day] = day_totals.get(day, 0) + amount
+    report["count"] = sum(type_counts)
+    report["total"] = sum(type_totals)
+    for code, name in enumerate(snapshot.type_names):
+        report["by_type"][name] = {
+            "count": type_counts[code],
+            "total": type_totals[code],
+            "credit": type_credits[code],
+            "debit": type_totals[code] - type_credits[code]
+        }
+    for code in sorted(account_counts):
+        report["by_account"][snapshot.account_ids[code]] = {"count": account_counts[code], "total": account_totals[code]}
+    for day in sorted(day_counts):
+        report["by_day"][_day(day)] = {"count": day_counts[day], "total": day_totals[day]}
+    return report
+
+def build_report(snapshot, start=None, end=None, use_numpy=True):
+    start, end = _micros(start), _micros(end)
+    if len(snapshot) == 0:
+        return _empty_report(snapshot)
+    if use_numpy and load_numpy() is not None:
+        return _report_numpy(snapshot, start, end)
+    return _report_python(snapshot, start, end)
+
+def type_total(report, transaction_type, field="total"):
+    return report["by_type"].get(transaction_type, {}).get(field, 0)
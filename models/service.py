@@ -0,0 +1,159 @@
+from models.core import UserRole
+from models.money import to_minor, format_money
+from models.reports import LedgerSnapshot, build_report, type_total
+from models.utils import generate_id
+
+SORT_KEYS = ("date_desc", "date_asc", "amount_desc", "amount_asc")
+ACCOUNT_NOT_FOUND = "Рахунок не знайдено"
+
+# Business rules shared by the Tk GUI and the headless API. Every operation takes
+# the caller's AuthManager and returns (success, message) like Database does
+class BankService:
+    def __init__(self, database):
+        self.db = database
+
+    def _owns(self, auth, account):
+        return (account is not None and auth.current_user is not None
+                and account.user_id == auth.current_user.user_id)
+
+    def register(self, username, password, confirm_password, role):
+        if not username or not password or not confirm_password:
+            return False, "Усі поля обов'язкові"
+        if password != confirm_password:
+            return False, "Паролі не збігаються"
+        if len(password) < 6:
+            return False, "Пароль має містити щонайменше 6 символів"
+        if not all(c.isalpha() for c in username):
+            return False, "Ім'я користувача має містити лише літери"
+        try:
+            role = UserRole(role)
+        except ValueError:
+            return False, "Невідома роль"
+        success, message = self.db.register_user(username, password, role)
+        if success:
+            self.db.log_action(f"Користувач зареєстрований: {username}")
+        return success, message
+
+    def login(self, auth, username, password):
+        if not auth.login(username, password):
+            return False, "Невірне ім'я користувача або пароль"
+        self.db.log_action(f"Користувач увійшов: {username}")
+        return True, "Вхід успішний"
+
+    def accounts(self, auth):
+        if auth.current_user is None:
+            return []
+        return self.db.get_user_accounts(auth.current_user.user_id)
+
+    def account(self, auth, account_id):
+        account = self.db.get_account(account_id)
+        return account if self._owns(auth, account) else None
+
+    def deposit(self, auth, account, amount_str):
+        if not self._owns(auth, account):
+            return False, ACCOUNT_NOT_FOUND
+        try:
+            amount = to_minor(amount_str)
+        except ValueError:
+            return False, "Невірне введення"
+        if amount <= 0:
+            return False, "Невірна сума"
+        success, message = self.db.add_deposit(account, amount)
+        if not success:
+            return False, message
+        self.db.log_action(f"Депозит: ${format_money(amount)} на рахунок {account.account_id}", accounts=[account.account_id], amount=amount)
+        return True, "Депозит успішний"
+
+    def transfer(self, auth, account, amount_str, recipient_username):
+        if not self._owns(auth, account):
+            return False, ACCOUNT_NOT_FOUND
+        try:
+            amount = to_minor(amount_str)
+        except ValueError:
+            return False, "Невірне введення"
+        if account.is_blocked:
+            return False, "Рахунок заблоковано"
+        if amount <= 0 or amount > account.balance:
+            return False, "Невірна сума"
+        if recipient_username == auth.current_user.username:
+            return False, "Неможливо переказати собі"
+        recipient_user = self.db.get_user_by_username(recipient_username)
+        if not recipient_user:
+            return False, "Отримувача не знайдено"
+        recipient_accounts = self.db.get_user_accounts(recipient_user.user_id)
+        if not recipient_accounts:
+            return False, "У отримувача немає активних рахунків"
+        recipient_account = recipient_accounts[0]  # Use first account of recipient
+        if recipient_account.is_blocked:
+            return False, "Рахунок отримувача заблоковано"
+        success, message = self.db.transfer(account, recipient_account, amount)
+        if not success:
+            return False, message
+        self.db.log_action(f"Переказ: ${format_money(amount)} з {account.account_id} на {recipient_account.account_id} (користувач: {recipient_username})",
+                           accounts=[account.account_id, recipient_account.account_id], amount=amount)
+        return True, "Переказ успішний"
+
+    def pay_bill(self, auth, account, amount_str):
+        if not self._owns(auth, account):
+            return False, ACCOUNT_NOT_FOUND
+        try:
+            amount = to_minor(amount_str)
+        except ValueError:
+            return False, "Невірне введення"
+        if account.is_blocked:
+            return False, "Рахунок заблоковано"
+        if amount <= 0 or amount > account.balance:
+            return False, "Невірна сума"
+        success, message = self.db.pay_bill(account, amount)
+        if not success:
+            return False, message
+        self.db.log_action(f"Оплата рахунку: ${format_money(amount)} з {account.account_id}", accounts=[account.account_id], amount=amount)
+        return True, "Рахунок оплачено успішно"
+
+    def create_account(self, auth):
+        if not auth.has_access(UserRole.CLIENT):
+            return False, "Доступ заборонено"
+        account_id = generate_id()
+        self.db.create_account(auth.current_user.user_id, account_id)
+        self.db.log_action(f"Новий рахунок створено: {account_id} для користувача {auth.current_user.user_id}", accounts=[account_id])
+        return True, account_id
+
+    def transactions(self, auth, account, sort_key="date_desc"):
+        if not self._owns(auth, account):
+            return []
+        return self.db.get_sorted_transactions(sort_key, account.account_id)
+
+    def all_transactions(self, auth, sort_key="date_desc"):
+        if not auth.has_access(UserRole.EMPLOYEE):
+            return []
+        return self.db.get_sorted_transactions(sort_key)
+
+    def block_account(self, auth, account_id):
+        if not auth.has_access(UserRole.EMPLOYEE):
+            return False, "Доступ заборонено"
+        if self.db.get_account(account_id) is None:
+            return False, ACCOUNT_NOT_FOUND
+        self.db.block_account(account_id)
+        self.db.log_action(f"Рахунок заблоковано: {account_id}", accounts=[account_id])
+        return True, f"Рахунок {account_id} заблоковано"
+
+    def unblock_account(self, auth, account_id):
+        if not auth.has_access(UserRole.EMPLOYEE):
+            return False, "Доступ заборонено"
+        if self.db.get_account(account_id) is None:
+            return False, ACCOUNT_NOT_FOUND
+        self.db.unblock_account(account_id)
+        self.db.log_action(f"Рахунок розблоковано: {account_id}", accounts=[account_id])
+        return True, f"Рахунок {account_id} розблоковано"
+
+    def report(self, auth):
+        if not auth.has_access(UserRole.EMPLOYEE):
+            return False, "Доступ заборонено"
+        report = build_report(LedgerSnapshot.from_database(self.db))
+        total_deposits = type_total(report, "deposit")
+        total_transfers = type_total(report, "transfer", "credit")
+        total_payments = -type_total(report, "bill_payment")
+        self.db.export_report(total_deposits, total_transfers, total_payments, report)
+        self.db.log_action("Звіт експортовано")
+        report["totals"] = {"deposits": total_deposits, "transfers": total_transfers, "payments": total_payments}
+        return True, report
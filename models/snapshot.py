@@ -0,0 +1,178 @@
+import mmap
+import struct
+import sys
+from array import array
+from models.core import User, Account, UserRole
+from models.storage import ColumnarTransactionMap, EPOCH, MICROSECOND
+
+# Binary snapshot: the same content as data.json, laid out so that loading is a few
+# memcpys instead of a JSON parse and a fromisoformat per row.
+#   header   MAGIC, <H format version> <H data version (SNAPSHOT_VERSION)> <I reserved>
+#   blocks   <Q length> + payload, each padded to a multiple of 8 bytes, in this order:
+#     strings        table shared by users and accounts
+#     users          <IIII> records: user_id, username, password, role (string indexes)
+#     accounts       <IIqB3x> records: account_id, user_id (string indexes), balance, blocked
+#     ids            table of transaction ids, one per row
+#     account_ids    table the accounts column points into
+#     type_names     table the types column points into
+#     accounts       uint32[rows]
+#     amounts        int64[rows]  minor units
+#     timestamps     int64[rows]  microseconds since 1970-01-01
+#     types          uint8[rows]
+# A table is <Q count>, uint64 character offsets[count + 1] and the strings as one
+# utf-8 blob. Numbers are little-endian; since every block starts 8-byte aligned, the
+# columns can be used straight out of the mmap (see SnapshotReader.columns)
+MAGIC = b"BANKSNP1"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHHI")
+USER = struct.Struct("<IIII")
+ACCOUNT = struct.Struct("<IIqB3x")
+COLUMN_CODES = ("I", "q", "q", "B")
+
+def is_binary_snapshot(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def _native(column):
+    if sys.byteorder != "little":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column
+
+def _pack_table(values):
+    text = "".join(values)
+    offsets = array("Q", [0])
+    position = 0
+    for value in values:
+        position += len(value)
+        offsets.append(position)
+    return struct.pack("<Q", len(values)) + _native(offsets).tobytes() + text.encode("utf-8")
+
+def capture(database):
+    # Everything the file needs, copied while the caller holds the state lock; the
+    # slow part (packing and writing) then runs without it
+    transactions = database.transactions
+    if not isinstance(transactions, ColumnarTransactionMap):
+        transactions = ColumnarTransactionMap()
+        for record in database.transactions.records():
+            transactions.add_record(record)
+    return (
+        [(user.user_id, user.username, user.password, user.role.value) for user in list(database.users.values())],
+        [(account.account_id, account.user_id, account.balance, account.is_blocked) for account in list(database.accounts.values())],
+        transactions.ids(),
+        transactions.columns()
+    )
+
+def write_snapshot(f, captured, data_version):
+    # f: a file opened for binary writing
+    users, accounts, ids, (account_ids, type_names, *columns) = captured
+    strings = []
+    codes = {}
+
+    def code(value):
+        index = codes.get(value)
+        if index is None:
+            index = codes[value] = len(strings)
+            strings.append(value)
+        return index
+
+    user_block = b"".join(USER.pack(code(user_id), code(username), code(password), code(role))
+                          for user_id, username, password, role in users)
+    account_block = b"".join(ACCOUNT.pack(code(account_id), code(user_id), balance, is_blocked)
+                             for account_id, user_id, balance, is_blocked in accounts)
+    blocks = [_pack_table(strings), user_block, account_block, _pack_table(ids), _pack_table(account_ids), _pack_table(type_names)]
+    blocks.extend(_native(array(typecode, column)).tobytes() for typecode, column in zip(COLUMN_CODES, columns))
+    f.write(HEADER.pack(MAGIC, FORMAT_VERSION, data_version, 0))
+    for block in blocks:
+        f.write(struct.pack("<Q", len(block)))
+        f.write(block)
+        f.write(b"\0" * (-len(block) % 8))
+
+# Maps the file and hands out views into it. Numeric columns are memoryviews over the
+# mapping (no copy on little-endian hosts); strings are decoded one table at a time,
+# only when asked for. Views must not be used after close()
+class SnapshotReader:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        magic, self.format_version, self.data_version, _ = HEADER.unpack_from(self.view)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path}: не бінарний знімок")
+        if self.format_version > FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path}: невідома версія формату {self.format_version}")
+        self.blocks = []
+        position = HEADER.size
+        while position < len(self.view):
+            (length,) = struct.unpack_from("<Q", self.view, position)
+            position += 8
+            self.blocks.append(self.view[position:position + length])
+            position += length + (-length % 8)
+        self._strings = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if getattr(self, "blocks", None) is not None:
+            for block in self.blocks:
+                block.release()
+            self.blocks = None
+        if getattr(self, "view", None) is not None:
+            self.view.release()
+            self.view = None
+        self.map.close()
+        self.file.close()
+
+    def _column(self, block, typecode):
+        if sys.byteorder == "little":
+            return block.cast(typecode)
+        column = array(typecode, block.tobytes())
+        column.byteswap()
+        return column
+
+    def _table(self, block):
+        (count,) = struct.unpack_from("<Q", block)
+        end = 8 + (count + 1) * 8
+        offsets = self._column(block[8:end], "Q")
+        text = str(block[end:], "utf-8")
+        return [text[offsets[index]:offsets[index + 1]] for index in range(count)]
+
+    def strings(self):
+        if self._strings is None:
+            self._strings = self._table(self.blocks[0])
+        return self._strings
+
+    def users(self):
+        strings = self.strings()
+        for user_id, username, password, role in USER.iter_unpack(self.blocks[1]):
+            yield User(strings[user_id], strings[username], strings[password], UserRole(strings[role]))
+
+    def accounts(self):
+        strings = self.strings()
+        for account_id, user_id, balance, is_blocked in ACCOUNT.iter_unpack(self.blocks[2]):
+            account = Account(strings[account_id], strings[user_id], balance)
+            account.is_blocked = bool(is_blocked)
+            yield account
+
+    def ids(self):
+        return self._table(self.blocks[3])
+
+    def columns(self):
+        # Same shape as ColumnarTransactionMap.columns(), so LedgerSnapshot can take it as is
+        return (self._table(self.blocks[4]), self._table(self.blocks[5]),
+                *(self._column(block, typecode) for block, typecode in zip(self.blocks[6:10], COLUMN_CODES)))
+
+    def records(self):
+        account_ids, type_names, accounts, amounts, timestamps, types = self.columns()
+        for row, transaction_id in enumerate(self.ids()):
+            yield (transaction_id, account_ids[accounts[row]], amounts[row], type_names[types[row]],
+                   (EPOCH + timestamps[row] * MICROSECOND).isoformat())
@@ -0,0 +1,369 @@
+import os
+import sqlite3
+import threading
+import weakref
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from models.core import User, Account, Transaction, UserRole
+from models.money import to_minor, migrate_item
+from models.passwords import is_hashed
+from models.snapshot import SnapshotReader, is_binary_snapshot
+from models.store import DAILY_DEPOSIT_LIMIT, Store
+from models.streaming import iter_json_sections
+from models.utils import generate_id, use_node_id
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username ON users(username);
+CREATE TABLE IF NOT EXISTS accounts (
+    account_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    balance INTEGER NOT NULL,
+    is_blocked INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_accounts_user_id ON accounts(user_id);
+CREATE TABLE IF NOT EXISTS transactions (
+    transaction_id TEXT PRIMARY KEY,
+    account_id TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    transaction_type TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_account_ts ON transactions(account_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_transactions_account_amount ON transactions(account_id, amount);
+CREATE INDEX IF NOT EXISTS idx_transactions_ts ON transactions(timestamp);
+CREATE INDEX IF NOT EXISTS idx_transactions_amount ON transactions(amount);
+CREATE TABLE IF NOT EXISTS writers (node INTEGER PRIMARY KEY AUTOINCREMENT);
+"""
+ORDER_BY = {
+    "date_desc": "timestamp DESC, rowid DESC",
+    "date_asc": "timestamp, rowid",
+    "amount_desc": "amount DESC, rowid DESC",
+    "amount_asc": "amount, rowid"
+}
+SCHEMA_VERSION = 2
+
+# Created through Database(..., backend="sqlite"). The JSON-store options (journal, lazy,
+# async_writes, ...) are accepted and ignored. Writes stay synchronous here: reads go to
+# the same file, so queueing them would break read-your-writes
+class SQLiteDatabase(Store):
+    def __init__(self, file_path="data.json", log_path="log.jsonl", lock_stripes=64, read_only=False, **kwargs):
+        # file_path (data.json or a binary snapshot such as data.snap) is only read once,
+        # to seed a new data.db next to it
+        self.json_path = file_path
+        super().__init__(os.path.splitext(file_path)[0] + ".db", log_path, lock_stripes, read_only)
+        # Only serializes statements; check-then-update sequences also need the account's stripe
+        self.lock = threading.RLock()
+        # Identity map: transfer, add_deposit and pay_bill update the balance of the Account
+        # object they are given, so every live Account for an id must be the same object
+        self._accounts = weakref.WeakValueDictionary()
+        if read_only:
+            # No schema, seeding or migration: the file is opened exactly as it is
+            self.conn = sqlite3.connect(f"file:{self.file_path}?mode=ro", uri=True, check_same_thread=False)
+            return
+        is_new = not os.path.exists(self.file_path)
+        self.conn = sqlite3.connect(self.file_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        if is_new:
+            self.load_from_json()
+        self._migrate()
+        # Every writable open takes the next node number, so processes writing this file
+        # at the same time mint ids from different nodes (unless 1024 opens lie between)
+        with self.lock, self.conn:
+            use_node_id(self.conn.execute("INSERT INTO writers DEFAULT VALUES").lastrowid)
+
+    def _migrate(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            with self.lock, self.conn:
+                # Version 0 databases kept float major units in REAL columns
+                self.conn.execute("UPDATE accounts SET balance = CAST(ROUND(balance * 100) AS INTEGER) WHERE typeof(balance) = 'real'")
+                self.conn.execute("UPDATE transactions SET amount = CAST(ROUND(amount * 100) AS INTEGER) WHERE typeof(amount) = 'real'")
+                self.conn.execute("PRAGMA user_version = 1")
+        if version < 2:
+            # Version 1 databases (and anything seeded from an old data.json) keep plaintext passwords
+            users = [row for row in self._query("SELECT user_id, password FROM users") if not is_hashed(row[1])]
+            hashed = self.passwords.hash_many(row[1] for row in users)
+            with self.lock, self.conn:
+                self.conn.executemany("UPDATE users SET password = ? WHERE user_id = ?", [(password, row[0]) for password, row in zip(hashed, users)])
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def load_from_json(self):
+        try:
+            if is_binary_snapshot(self.json_path):
+                # Transaction records already have the column layout of the table
+                with SnapshotReader(self.json_path) as reader, self.lock, self.conn:
+                    self.conn.executemany("INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?)", map(self._user_row, reader.users()))
+                    self.conn.executemany("INSERT OR REPLACE INTO accounts VALUES (?, ?, ?, ?)", map(self._account_row, reader.accounts()))
+                    self.conn.executemany("INSERT OR REPLACE INTO transactions VALUES (?, ?, ?, ?, ?)", reader.records())
+            elif os.path.exists(self.json_path) and self.json_path != self.file_path:
+                legacy = True
+                with open(self.json_path, 'r') as f, self.lock, self.conn:
+                    for section, item in iter_json_sections(f):
+                        if section == "version":
+                            legacy = False
+                            continue
+                        if legacy:
+                            item = migrate_item(section, item)
+                        if section == "users":
+                            self.conn.execute("INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?)", self._user_row(User.from_dict(item)))
+                        elif section == "accounts":
+                            self.conn.execute("INSERT OR REPLACE INTO accounts VALUES (?, ?, ?, ?)", self._account_row(Account.from_dict(item)))
+                        elif section == "transactions":
+                            self.conn.execute("INSERT OR REPLACE INTO transactions VALUES (?, ?, ?, ?, ?)", self._transaction_row(Transaction.from_dict(item)))
+            else:
+                with self.lock, self.conn:
+                    self.conn.executemany("INSERT INTO users VALUES (?, ?, ?, ?)", [("u1", "client1", "pass123", "client"), ("u2", "employee1", "pass456", "employee")])
+                    self.conn.execute("INSERT INTO accounts VALUES (?, ?, ?, ?)", self._account_row(Account("a1", "u1", to_minor(1000))))
+                    self.conn.execute("INSERT INTO transactions VALUES (?, ?, ?, ?, ?)", self._transaction_row(Transaction("t1", "a1", to_minor(100), "deposit")))
+        except Exception as e:
+            self.log_action(f"Помилка завантаження JSON: {str(e)}")
+
+    def save_to_json(self):
+        try:
+            with self.lock:
+                self.conn.commit()
+            return True
+        except Exception as e:
+            self.log_action(f"Помилка збереження бази даних: {str(e)}")
+            return False
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+        super().close()
+
+    @staticmethod
+    def _user_row(user):
+        return (user.user_id, user.username, user.password, user.role.value)
+
+    @staticmethod
+    def _account_row(account):
+        return (account.account_id, account.user_id, account.balance, int(account.is_blocked))
+
+    @staticmethod
+    def _transaction_row(transaction):
+        return (transaction.transaction_id, transaction.account_id, transaction.amount,
+                transaction.transaction_type, transaction.timestamp.isoformat())
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _execute(self, statements):
+        try:
+            with self.lock, self.conn:
+                for sql, params in statements:
+                    self.conn.execute(sql, params)
+            return True
+        except sqlite3.Error as e:
+            self.log_action(f"Помилка запису в базу даних: {str(e)}")
+            return False
+
+    @staticmethod
+    def _to_user(row):
+        return User(row[0], row[1], row[2], UserRole(row[3]))
+
+    def _to_account(self, row):
+        account = self._accounts.get(row[0])
+        if account is None:
+            # int() because pre-migration REAL columns keep REAL affinity
+            account = Account(row[0], row[1], int(row[2]))
+            account.is_blocked = bool(row[3])
+            self._accounts[row[0]] = account
+        return account
+
+    @staticmethod
+    def _to_transaction(row):
+        return Transaction(row[0], row[1], int(row[2]), row[3], datetime.fromisoformat(row[4]))
+
+    def register_user(self, username, password, role):
+        if self.get_user_by_username(username):
+            return False, "Ім'я користувача вже існує"
+        user = User(generate_id(), username, self.passwords.hash(password), role)
+        statements = [("INSERT INTO users VALUES (?, ?, ?, ?)", self._user_row(user))]
+        if role == UserRole.CLIENT:
+            statements.append(("INSERT INTO accounts VALUES (?, ?, ?, ?)", self._account_row(Account(generate_id(), user.user_id))))
+        if not self._execute(statements):
+            return False, "Ім'я користувача вже існує"
+        return True, "Реєстрація успішна"
+
+    def get_user_by_username(self, username):
+        rows = self._query("SELECT * FROM users WHERE username = ?", (username,))
+        return self._to_user(rows[0]) if rows else None
+
+    def get_user_by_id(self, user_id):
+        rows = self._query("SELECT * FROM users WHERE user_id = ?", (user_id,))
+        return self._to_user(rows[0]) if rows else None
+
+    def get_account(self, account_id):
+        rows = self._query("SELECT * FROM accounts WHERE account_id = ?", (account_id,))
+        return self._to_account(rows[0]) if rows else None
+
+    def get_user_accounts(self, user_id):
+        rows = self._query("SELECT * FROM accounts WHERE user_id = ? ORDER BY rowid", (user_id,))
+        return [self._to_account(row) for row in rows]
+
+    def create_account(self, user_id, account_id):
+        self._execute([("INSERT INTO accounts VALUES (?, ?, ?, ?)", self._account_row(Account(account_id, user_id)))])
+
+    def bulk_load(self, users=(), accounts=(), transactions=(), commit=False):
+        # Without commit the rows stay in the open SQLite transaction until finish_bulk_load()
+        try:
+            with self.lock:
+                self.conn.executemany("INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?)", [self._user_row(user) for user in users])
+                self.conn.executemany("INSERT OR REPLACE INTO accounts VALUES (?, ?, ?, ?)", [self._account_row(account) for account in accounts])
+                self.conn.executemany("INSERT OR REPLACE INTO transactions VALUES (?, ?, ?, ?, ?)", transactions)
+                if commit:
+                    self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            self.log_action(f"Помилка запису в базу даних: {str(e)}")
+            return False
+
+    def finish_bulk_load(self):
+        return self.save_to_json()
+
+    def add_transaction(self, transaction):
+        with self.account_locks.hold(transaction.account_id):
+            statements = [("INSERT OR REPLACE INTO transactions VALUES (?, ?, ?, ?, ?)", self._transaction_row(transaction))]
+            # The caller has already adjusted the balance of the live Account object
+            account = self._accounts.get(transaction.account_id)
+            if account is not None:
+                statements.append(("UPDATE accounts SET balance = ? WHERE account_id = ?", (account.balance, account.account_id)))
+            self._execute(statements)
+
+    def transfer(self, source, target, amount):
+        with self.account_locks.hold(source.account_id, target.account_id):
+            if source.is_blocked or target.is_blocked:
+                return False, "Рахунок заблоковано"
+            if amount <= 0 or amount > source.balance:
+                return False, "Невірна сума"
+            debit = Transaction(generate_id(), source.account_id, -amount, "transfer")
+            credit = Transaction(generate_id(), target.account_id, amount, "transfer")
+            source.balance -= amount
+            target.balance += amount
+            if not self._execute([
+                ("INSERT INTO transactions VALUES (?, ?, ?, ?, ?)", self._transaction_row(debit)),
+                ("INSERT INTO transactions VALUES (?, ?, ?, ?, ?)", self._transaction_row(credit)),
+                ("UPDATE accounts SET balance = ? WHERE account_id = ?", (source.balance, source.account_id)),
+                ("UPDATE accounts SET balance = ? WHERE account_id = ?", (target.balance, target.account_id)),
+            ]):
+                source.balance += amount
+                target.balance -= amount
+                return False, "Помилка збереження переказу"
+        return True, "Переказ успішний"
+
+    def pay_bill(self, account, amount):
+        with self.account_locks.hold(account.account_id):
+            if account.is_blocked:
+                return False, "Рахунок заблоковано"
+            if amount <= 0 or amount > account.balance:
+                return False, "Невірна сума"
+            payment = Transaction(generate_id(), account.account_id, -amount, "bill_payment")
+            account.balance -= amount
+            if not self._execute([
+                ("INSERT INTO transactions VALUES (?, ?, ?, ?, ?)", self._transaction_row(payment)),
+                ("UPDATE accounts SET balance = ? WHERE account_id = ?", (account.balance, account.account_id)),
+            ]):
+                account.balance += amount
+                return False, "Помилка збереження платежу"
+        return True, "Рахунок оплачено успішно"
+
+    def get_account_transactions(self, account_id):
+        rows = self._query("SELECT * FROM transactions WHERE account_id = ? ORDER BY timestamp", (account_id,))
+        return [self._to_transaction(row) for row in rows]
+
+    def _set_blocked(self, account_id, is_blocked):
+        with self.account_locks.hold(account_id):
+            if self._execute([("UPDATE accounts SET is_blocked = ? WHERE account_id = ?", (int(is_blocked), account_id))]):
+                account = self._accounts.get(account_id)
+                if account is not None:
+                    account.is_blocked = is_blocked
+
+    def get_sorted_transactions(self, sort_key, account_id=None):
+        return SQLiteOrderedView(self, ORDER_BY[sort_key], account_id)
+
+    def get_all_transactions(self):
+        return [self._to_transaction(row) for row in self._query("SELECT * FROM transactions ORDER BY rowid")]
+
+    def transaction_records(self, chunk_size=10000):
+        last_rowid = 0
+        while True:
+            rows = self._query("SELECT rowid, * FROM transactions WHERE rowid > ? ORDER BY rowid LIMIT ?", (last_rowid, chunk_size))
+            if not rows:
+                return
+            for row in rows:
+                yield (row[1], row[2], int(row[3]), row[4], row[5])
+            last_rowid = rows[-1][0]
+
+    def add_deposit(self, account, amount):
+        with self.account_locks.hold(account.account_id, account.user_id):
+            today = datetime.now().date()
+            start = datetime.combine(today, datetime.min.time())
+            rows = self._query(
+                "SELECT COALESCE(SUM(t.amount), 0) FROM transactions t JOIN accounts a ON a.account_id = t.account_id "
+                "WHERE a.user_id = ? AND t.transaction_type = 'deposit' AND t.timestamp >= ? AND t.timestamp < ?",
+                (account.user_id, start.isoformat(), (start + timedelta(days=1)).isoformat())
+            )
+            if int(rows[0][0]) + amount > DAILY_DEPOSIT_LIMIT:
+                return False, "Перевищено денний ліміт депозиту 100,000"
+            deposit = Transaction(generate_id(), account.account_id, amount, "deposit")
+            account.balance += amount
+            if not self._execute([
+                ("INSERT INTO transactions VALUES (?, ?, ?, ?, ?)", self._transaction_row(deposit)),
+                ("UPDATE accounts SET balance = ? WHERE account_id = ?", (account.balance, account.account_id)),
+            ]):
+                account.balance -= amount
+                return False, "Помилка збереження депозиту"
+            return True, "Депозит дозволено"
+
+    def balance_at(self, account_id, when):
+        # Current balance minus the entries posted after `when`: a range scan of the
+        # (account_id, timestamp) index rather than a replay of the whole history
+        if isinstance(when, datetime):
+            when = when.isoformat()
+        rows = self._query(
+            "SELECT balance - (SELECT COALESCE(SUM(amount), 0) FROM transactions WHERE account_id = ? AND timestamp > ?) "
+            "FROM accounts WHERE account_id = ?",
+            (account_id, when, account_id)
+        )
+        return int(rows[0][0]) if rows else None
+
+# Same contract as storage.OrderedView, read page by page through the ORDER BY indexes
+class SQLiteOrderedView(Sequence):
+    def __init__(self, database, order_by, account_id=None, page_size=200):
+        self.database = database
+        self.order_by = order_by
+        self.page_size = page_size
+        self.where, self.params = ("WHERE account_id = ?", (account_id,)) if account_id is not None else ("", ())
+        self.size = database._query(f"SELECT COUNT(*) FROM transactions {self.where}", self.params)[0][0]
+        self.pages = {}
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(self.size))]
+        if position < 0:
+            position += self.size
+        if not 0 <= position < self.size:
+            raise IndexError("SQLiteOrderedView index out of range")
+        page, offset = divmod(position, self.page_size)
+        if page not in self.pages:
+            if len(self.pages) >= 8:
+                self.pages.clear()
+            rows = self.database._query(
+                f"SELECT * FROM transactions {self.where} ORDER BY {self.order_by} LIMIT ? OFFSET ?",
+                self.params + (self.page_size, page * self.page_size)
+            )
+            self.pages[page] = [self.database._to_transaction(row) for row in rows]
+        return self.pages[page][offset]
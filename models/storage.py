@@ -0,0 +1,332 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import MutableMapping, Sequence
+from datetime import datetime, timedelta
+from models.core import Transaction
+
+# transaction_id -> Transaction. Loaded history can be kept as raw records
+# (see Transaction.to_record) that only become Transaction objects on access
+class TransactionMap(MutableMapping):
+    def __init__(self):
+        self._items = {}
+
+    def __getitem__(self, transaction_id):
+        item = self._items[transaction_id]
+        if isinstance(item, Transaction):
+            return item
+        return Transaction.from_record(item)
+
+    def __setitem__(self, transaction_id, transaction):
+        self._items[transaction_id] = transaction
+
+    def __delitem__(self, transaction_id):
+        del self._items[transaction_id]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, transaction_id):
+        return transaction_id in self._items
+
+    def add_record(self, record):
+        self._items[record[0]] = record
+
+    def record(self, transaction_id):
+        item = self._items.get(transaction_id)
+        if isinstance(item, Transaction):
+            return item.to_record()
+        return item
+
+    def records(self):
+        for item in list(self._items.values()):
+            yield item.to_record() if isinstance(item, Transaction) else item
+
+    # Indexes hold refs: here the transaction id, in ColumnarTransactionMap the row number
+    REF_TYPECODE = None
+
+    def ref(self, transaction_id):
+        return transaction_id
+
+    def at(self, ref):
+        return self[ref]
+
+    def index_columns(self):
+        # refs followed by columns() (account_ids, type_names, accounts, amounts,
+        # timestamps, types), position i of each column describing refs[i]
+        columnar = ColumnarTransactionMap()
+        for record in self.records():
+            columnar.add_record(record)
+        return (columnar.ids(), *columnar.columns())
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+def _copy_column(typecode, column):
+    # From an array or a memoryview of the same item type, as a single memcpy
+    copy = array(typecode)
+    copy.frombytes(memoryview(column).cast("B"))
+    return copy
+
+# Same mapping, but every field lives in a typed column: account ids and types are
+# codes into small string tables and timestamps are microseconds since EPOCH
+class ColumnarTransactionMap(TransactionMap):
+    def __init__(self):
+        self._rows = {}
+        self._ids = []
+        self._accounts = array("I")
+        self._amounts = array("q")
+        self._timestamps = array("q")
+        self._types = array("B")
+        self._account_ids = []
+        self._account_codes = {}
+        self._type_names = []
+        self._type_codes = {}
+
+    @staticmethod
+    def _code(value, names, codes):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def _store(self, transaction_id, account_id, amount, transaction_type, timestamp):
+        account = self._code(account_id, self._account_ids, self._account_codes)
+        type_code = self._code(transaction_type, self._type_names, self._type_codes)
+        micros = (timestamp - EPOCH) // MICROSECOND
+        row = self._rows.get(transaction_id)
+        if row is None:
+            self._accounts.append(account)
+            self._amounts.append(amount)
+            self._timestamps.append(micros)
+            self._types.append(type_code)
+            # Appended last so a concurrent records() never sees a half-written row
+            self._rows[transaction_id] = len(self._ids)
+            self._ids.append(transaction_id)
+        else:
+            self._accounts[row] = account
+            self._amounts[row] = amount
+            self._timestamps[row] = micros
+            self._types[row] = type_code
+
+    def _record(self, row):
+        return (
+            self._ids[row],
+            self._account_ids[self._accounts[row]],
+            self._amounts[row],
+            self._type_names[self._types[row]],
+            (EPOCH + self._timestamps[row] * MICROSECOND).isoformat()
+        )
+
+    def __getitem__(self, transaction_id):
+        return self.at(self._rows[transaction_id])
+
+    REF_TYPECODE = "q"
+
+    def ref(self, transaction_id):
+        return self._rows[transaction_id]
+
+    def at(self, row):
+        return Transaction(
+            self._ids[row],
+            self._account_ids[self._accounts[row]],
+            self._amounts[row],
+            self._type_names[self._types[row]],
+            EPOCH + self._timestamps[row] * MICROSECOND
+        )
+
+    def __setitem__(self, transaction_id, transaction):
+        self._store(transaction_id, transaction.account_id, transaction.amount, transaction.transaction_type, transaction.timestamp)
+
+    def __delitem__(self, transaction_id):
+        row = self._rows.pop(transaction_id)
+        self._ids[row] = None
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, transaction_id):
+        return transaction_id in self._rows
+
+    def add_record(self, record):
+        self._store(record[0], record[1], record[2], record[3], datetime.fromisoformat(record[4]))
+
+    def record(self, transaction_id):
+        row = self._rows.get(transaction_id)
+        return None if row is None else self._record(row)
+
+    def records(self):
+        for row in range(len(self._ids)):
+            if self._ids[row] is not None:
+                yield self._record(row)
+
+    @classmethod
+    def from_columns(cls, ids, account_ids, type_names, accounts, amounts, timestamps, types):
+        # Adopts whole columns at once (one memcpy each) instead of storing row by row
+        transactions = cls()
+        transactions._ids = list(ids)
+        transactions._rows = dict(zip(transactions._ids, range(len(transactions._ids))))
+        transactions._account_ids = list(account_ids)
+        transactions._account_codes = dict(zip(transactions._account_ids, range(len(transactions._account_ids))))
+        transactions._type_names = list(type_names)
+        transactions._type_codes = dict(zip(transactions._type_names, range(len(transactions._type_names))))
+        transactions._accounts = _copy_column("I", accounts)
+        transactions._amounts = _copy_column("q", amounts)
+        transactions._timestamps = _copy_column("q", timestamps)
+        transactions._types = _copy_column("B", types)
+        return transactions
+
+    def ids(self):
+        # Live transaction ids, in the row order columns() uses
+        return [transaction_id for transaction_id in self._ids if transaction_id is not None]
+
+    def index_columns(self):
+        # The live columns themselves, no copy, unless deleted rows have to be skipped.
+        # Only valid while the caller holds the lock that guards writes
+        rows = len(self._ids)
+        if len(self._rows) == rows:
+            return (range(rows), self._account_ids, self._type_names,
+                    self._accounts, self._amounts, self._timestamps, self._types)
+        live = array("q", (row for row in range(rows) if self._ids[row] is not None))
+        return (live, *self.columns())
+
+    def columns(self):
+        rows = len(self._ids)
+        accounts, amounts = self._accounts[:rows], self._amounts[:rows]
+        timestamps, types = self._timestamps[:rows], self._types[:rows]
+        if len(self._rows) != rows:
+            live = [row for row in range(rows) if self._ids[row] is not None]
+            accounts = array("I", (accounts[row] for row in live))
+            amounts = array("q", (amounts[row] for row in live))
+            timestamps = array("q", (timestamps[row] for row in live))
+            types = array("B", (types[row] for row in live))
+        return list(self._account_ids), list(self._type_names), accounts, amounts, timestamps, types
+
+def timestamp_key(timestamp):
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return (timestamp - EPOCH) // MICROSECOND
+
+# Transaction refs (see TransactionMap.ref) kept sorted by an integer key (timestamp
+# micros or amount). Keys and, for the columnar store, refs are flat int64 arrays, so
+# an index costs 16 bytes a row and an insert is a bisect and a memmove.
+# Ties keep the order entries arrived in: build_indexes sorts stably on the key alone
+# and insert() goes after equal keys. Ids are never compared (see models/utils.py)
+class SortedIndex:
+    def __init__(self, ref_typecode=None):
+        self.keys = array("q")
+        self.refs = array(ref_typecode) if ref_typecode else []
+
+    def __len__(self):
+        return len(self.refs)
+
+    def append(self, key, ref, amount=0):
+        # Only for entries that arrive in key order (see build_indexes)
+        self.keys.append(key)
+        self.refs.append(ref)
+
+    def insert(self, key, ref, amount=0):
+        position = bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.refs.insert(position, ref)
+        return position
+
+    def remove(self, key, ref):
+        position = bisect_left(self.keys, key)
+        while self.refs[position] != ref:
+            position += 1
+        del self.keys[position]
+        del self.refs[position]
+        return position
+
+CHECKPOINT_EVERY = 64
+
+# An account's entries in time order, with their amounts. The running total is
+# checkpointed every CHECKPOINT_EVERY entries, so the balance at any moment is a
+# bisect plus at most CHECKPOINT_EVERY additions. Checkpoints past an out-of-order
+# insert are dropped and rebuilt on the next query; plain appends keep them all
+class Ledger(SortedIndex):
+    def __init__(self, ref_typecode=None):
+        super().__init__(ref_typecode)
+        self.amounts = array("q")
+        self.total = 0
+        self.checkpoints = array("q", [0])
+
+    def _invalidate(self, position):
+        del self.checkpoints[position // CHECKPOINT_EVERY + 1:]
+
+    def append(self, key, ref, amount=0):
+        super().append(key, ref)
+        self.amounts.append(amount)
+        self.total += amount
+
+    def insert(self, key, ref, amount=0):
+        position = super().insert(key, ref)
+        self.amounts.insert(position, amount)
+        self.total += amount
+        self._invalidate(position)
+        return position
+
+    def remove(self, key, ref):
+        position = super().remove(key, ref)
+        self.total -= self.amounts[position]
+        del self.amounts[position]
+        self._invalidate(position)
+        return position
+
+    def total_before(self, position):
+        # Sum of the first `position` amounts
+        block = position // CHECKPOINT_EVERY
+        while len(self.checkpoints) <= block:
+            start = (len(self.checkpoints) - 1) * CHECKPOINT_EVERY
+            self.checkpoints.append(self.checkpoints[-1] + sum(self.amounts[start:start + CHECKPOINT_EVERY]))
+        return self.checkpoints[block] + sum(self.amounts[block * CHECKPOINT_EVERY:position])
+
+    def total_through(self, key):
+        # Sum of every amount at or before `key`
+        return self.total_before(bisect_right(self.keys, key))
+
+def build_indexes(columns, keys, ref_typecode=None, account_index=SortedIndex):
+    # columns as from TransactionMap.index_columns, keys one of its columns. One stable
+    # sort of the row positions, then a single pass that appends to the overall index
+    # and to one account_index per account, so no per-row tuples are ever built
+    refs, account_ids, _, accounts, amounts = columns[:5]
+    overall = SortedIndex(ref_typecode)
+    by_code = [None] * len(account_ids)
+    for position in sorted(range(len(refs)), key=keys.__getitem__):
+        key, ref, code = keys[position], refs[position], accounts[position]
+        overall.append(key, ref)
+        index = by_code[code]
+        if index is None:
+            index = by_code[code] = account_index(ref_typecode)
+        index.append(key, ref, amounts[position])
+    return overall, {account_ids[code]: index for code, index in enumerate(by_code) if index is not None}
+
+# Read-only sequence over a SortedIndex, walked from either end. Only the rows
+# actually indexed (e.g. the visible window of a list) are materialized
+class OrderedView(Sequence):
+    def __init__(self, index, transactions, reverse=False):
+        self.index = index
+        self.transactions = transactions
+        self.reverse = reverse
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        size = len(self.index)
+        if position < 0:
+            position += size
+        if not 0 <= position < size:
+            raise IndexError("OrderedView index out of range")
+        if self.reverse:
+            position = size - 1 - position
+        return self.transactions.at(self.index.refs[position])
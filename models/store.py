@@ -0,0 +1,81 @@
+from datetime import datetime
+from models.audit import AuditLogger
+from models.locking import LockStripes
+from models.money import to_minor, format_money
+from models.passwords import PasswordHasher
+
+DAILY_DEPOSIT_LIMIT = to_minor(100000)
+
+# What both storage backends have in common: the audit log, password hashing, the
+# account lock stripes and the parts of the query/mutation surface that do not depend
+# on where the rows live. Database (JSON snapshot + journal) and SQLiteDatabase each
+# add their own storage, and everything the GUI, BankService and the tools call:
+#   register_user, get_user_by_username, get_user_by_id, get_account, get_user_accounts,
+#   create_account, bulk_load, finish_bulk_load, add_transaction, add_deposit, transfer,
+#   pay_bill, get_account_transactions, get_sorted_transactions, get_all_transactions,
+#   transaction_records, balance_at, save_to_json and _set_blocked
+class Store:
+    def __init__(self, file_path, log_path="log.jsonl", lock_stripes=64, read_only=False):
+        self.file_path = file_path
+        # read_only: never write to the storage files
+        self.read_only = read_only
+        self.audit = AuditLogger(log_path)
+        self.passwords = PasswordHasher()
+        # Background persistence, if the backend uses one (see when_durable)
+        self.worker = None
+        # Check-then-update sequences (balance checks, name checks) hold the stripes of
+        # the keys they touch
+        self.account_locks = LockStripes(lock_stripes)
+
+    def get_user(self, username, password):
+        user = self.get_user_by_username(username)
+        if user and self.passwords.verify(password, user.password):
+            return user
+        return None
+
+    def block_account(self, account_id):
+        self._set_blocked(account_id, True)
+
+    def unblock_account(self, account_id):
+        self._set_blocked(account_id, False)
+
+    def when_durable(self, callback):
+        # callback(ok) once every write queued so far has reached the disk
+        if self.worker is None:
+            callback(True)
+        else:
+            self.worker.barrier(callback)
+
+    def dispatch_acks(self):
+        if self.worker is not None:
+            self.worker.dispatch_acks()
+
+    def close(self):
+        # Backends close their own storage first and then call this
+        self.audit.close()
+        self.passwords.close()
+
+    def export_report(self, total_deposits, total_transfers, total_payments, report=None, path="report.txt"):
+        try:
+            with open(path, "w") as f:
+                f.write(f"Звіт про транзакції ({datetime.now()})\n")
+                f.write("-" * 40 + "\n")
+                f.write(f"Загальні депозити: ${format_money(total_deposits)}\n")
+                f.write(f"Загальні перекази: ${format_money(total_transfers)}\n")
+                f.write(f"Загальні оплати рахунків: ${format_money(total_payments)}\n")
+                if report is not None:
+                    f.write("-" * 40 + "\n")
+                    f.write(f"Усього транзакцій: {report['count']}\n")
+                    for transaction_type, totals in report["by_type"].items():
+                        f.write(f"{transaction_type}: {totals['count']} шт., ${format_money(totals['total'])}\n")
+                    f.write("-" * 40 + "\n")
+                    for day, totals in report["by_day"].items():
+                        f.write(f"{day}: {totals['count']} шт., ${format_money(totals['total'])}\n")
+        except Exception as e:
+            self.log_action(f"Помилка експорту звіту: {str(e)}")
+
+    def log_action(self, action, **fields):
+        self.audit.log(action, **fields)
+
+    def query_log(self, account_id=None, start=None, end=None):
+        return self.audit.query(account_id, start, end)
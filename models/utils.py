@@ -1,7 +1,77 @@
+import os
+import socket
+import threading
 import time
-import random
+import zlib
+from datetime import datetime, timezone
+
+# Snowflake-style ids: 41 bits of milliseconds since ID_EPOCH, 10 bits of node id and
+# a 12-bit per-millisecond sequence. They are written as fixed-width decimal strings,
+# so among these ids string order, numeric order and creation order are the same thing.
+# Older data also holds shorter legacy ids (ms timestamp + 4 random digits) that do not
+# compare with them as strings, so nothing orders records by id: sorting goes by the
+# stored timestamp or amount, ties by arrival order
+ID_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+ID_WIDTH = 19
+MAX_NODE = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+EPOCH_MS = int(ID_EPOCH.timestamp() * 1000)
+
+def default_node_id():
+    # BANK_NODE_ID pins the node explicitly. Otherwise host and pid are hashed into the
+    # 10 bits, which makes a clash unlikely, not impossible: two processes share a node
+    # 1 time in 1024 and may then mint the same id. That is enough for the JSON store,
+    # which has a single writer (the owner lock), but processes that write one SQLite
+    # file at once get a node handed out by the database instead (see use_node_id)
+    if os.environ.get("BANK_NODE_ID"):
+        return int(os.environ["BANK_NODE_ID"]) & MAX_NODE
+    return zlib.crc32(f"{socket.gethostname()}:{os.getpid()}".encode()) & MAX_NODE
+
+class IdGenerator:
+    def __init__(self, node_id=None):
+        self.node_id = default_node_id() if node_id is None else node_id & MAX_NODE
+        self.lock = threading.Lock()
+        self.last_ms = 0
+        self.sequence = 0
+
+    def next_int(self):
+        with self.lock:
+            now = int(time.time() * 1000) - EPOCH_MS
+            if now > self.last_ms:
+                self.last_ms = now
+                self.sequence = 0
+            else:
+                # Same millisecond, or the clock stepped back: stay on the last one.
+                # Once its sequence runs out, borrow the next millisecond instead of sleeping
+                self.sequence += 1
+                if self.sequence > MAX_SEQUENCE:
+                    self.last_ms += 1
+                    self.sequence = 0
+            return (self.last_ms << (NODE_BITS + SEQUENCE_BITS)) | (self.node_id << SEQUENCE_BITS) | self.sequence
+
+    def next_id(self):
+        return f"{self.next_int():0{ID_WIDTH}d}"
+
+    def set_node(self, node_id):
+        with self.lock:
+            self.node_id = node_id & MAX_NODE
+
+_generator = IdGenerator()
+
+def _reset_after_fork():
+    global _generator
+    _generator = IdGenerator()
+
+if hasattr(os, "register_at_fork"):
+    # A forked child would otherwise continue the parent's node and sequence
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 def generate_id():
-    timestamp = int(time.time() * 1000)
-    random_num = random.randint(1000, 9999)
-    return f"{timestamp}{random_num}"
\ No newline at end of file
+    return _generator.next_id()
+
+def use_node_id(node_id):
+    # A node assigned by shared storage; an explicit BANK_NODE_ID still wins
+    if not os.environ.get("BANK_NODE_ID"):
+        _generator.set_node(node_id)
@@ -0,0 +1,229 @@
+import argparse
+import asyncio
+import json
+import secrets
+import signal
+from models.auth import AuthManager
+from models.database import Database
+from models.metrics import metrics
+from models.service import ACCOUNT_NOT_FOUND, SORT_KEYS, BankService
+
+MAX_BODY = 1 << 20
+SLOW_ROUTES = ("/login", "/register")
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+# Headless JSON API over HTTP/1.1 (TCP or Unix socket). Every route is a POST with
+# a JSON body; everything except /register and /login needs the "token" that
+# /login returns. One event loop serves all clients over keep-alive connections
+class BankServer:
+    def __init__(self, database):
+        self.db = database
+        self.service = BankService(database)
+        self.sessions = {}
+        self.routes = {
+            "/register": self.register,
+            "/login": self.login,
+            "/logout": self.logout,
+            "/accounts": self.accounts,
+            "/accounts/create": self.create_account,
+            "/deposit": self.deposit,
+            "/transfer": self.transfer,
+            "/bill": self.pay_bill,
+            "/transactions": self.transactions,
+            "/block": self.block_account,
+            "/unblock": self.unblock_account,
+            "/report": self.report,
+        }
+
+    def _auth(self, body):
+        return self.sessions.get(body.get("token"))
+
+    def _result(self, success, message):
+        return {"ok": success, "message": message}
+
+    def register(self, auth, body):
+        return self._result(*self.service.register(body.get("username"), body.get("password"),
+                                                   body.get("confirm_password", body.get("password")),
+                                                   body.get("role", "client")))
+
+    def login(self, auth, body):
+        auth = metrics.instrument(AuthManager(self.db), "auth")
+        success, message = self.service.login(auth, body.get("username"), body.get("password"))
+        response = self._result(success, message)
+        if success:
+            token = secrets.token_hex(16)
+            self.sessions[token] = auth
+            response.update(token=token, role=auth.current_user.role.value)
+        return response
+
+    def logout(self, auth, body):
+        self.sessions.pop(body.get("token"), None)
+        auth.logout()
+        return self._result(True, "Вихід успішний")
+
+    def accounts(self, auth, body):
+        return {"ok": True, "accounts": [account.to_dict() for account in self.service.accounts(auth)]}
+
+    def create_account(self, auth, body):
+        success, result = self.service.create_account(auth)
+        if not success:
+            return self._result(success, result)
+        return {"ok": True, "account_id": result}
+
+    def deposit(self, auth, body):
+        account = self.service.account(auth, body.get("account_id"))
+        return self._result(*self.service.deposit(auth, account, str(body.get("amount", ""))))
+
+    def transfer(self, auth, body):
+        account = self.service.account(auth, body.get("account_id"))
+        return self._result(*self.service.transfer(auth, account, str(body.get("amount", "")), body.get("recipient")))
+
+    def pay_bill(self, auth, body):
+        account = self.service.account(auth, body.get("account_id"))
+        return self._result(*self.service.pay_bill(auth, account, str(body.get("amount", ""))))
+
+    def transactions(self, auth, body):
+        sort_key = body.get("sort", "date_desc")
+        if sort_key not in SORT_KEYS:
+            return 400, {"ok": False, "message": "Невірний порядок сортування"}
+        if "account_id" in body:
+            view = self.service.transactions(auth, self.service.account(auth, body["account_id"]), sort_key)
+        else:
+            view = self.service.all_transactions(auth, sort_key)
+        offset = max(0, int(body.get("offset", 0)))
+        limit = max(0, min(int(body.get("limit", 100)), 1000))
+        return {"ok": True, "total": len(view), "transactions": [t.to_dict() for t in view[offset:offset + limit]]}
+
+    def _set_blocked(self, auth, body, action):
+        account_id = body.get("account_id")
+        if not isinstance(account_id, str) or not account_id:
+            return 400, {"ok": False, "message": "Невірне введення"}
+        success, message = action(auth, account_id)
+        if message == ACCOUNT_NOT_FOUND:
+            return 404, self._result(success, message)
+        return self._result(success, message)
+
+    def block_account(self, auth, body):
+        return self._set_blocked(auth, body, self.service.block_account)
+
+    def unblock_account(self, auth, body):
+        return self._set_blocked(auth, body, self.service.unblock_account)
+
+    def report(self, auth, body):
+        success, report = self.service.report(auth)
+        if not success:
+            return self._result(success, report)
+        report["by_day"] = {day.isoformat(): values for day, values in report["by_day"].items()}
+        return {"ok": True, "report": report}
+
+    def handle(self, method, path, raw):
+        handler = self.routes.get(path)
+        if handler is None:
+            return 404, {"ok": False, "message": "Невідомий маршрут"}
+        if method != "POST":
+            return 405, {"ok": False, "message": "Дозволено лише POST"}
+        try:
+            body = json.loads(raw or b"{}")
+        except ValueError:
+            return 400, {"ok": False, "message": "Невірний JSON"}
+        if not isinstance(body, dict):
+            return 400, {"ok": False, "message": "Невірний JSON"}
+        auth = self._auth(body)
+        if auth is None and path not in ("/register", "/login"):
+            return 401, {"ok": False, "message": "Потрібна авторизація"}
+        try:
+            result = handler(auth, body)
+        except (TypeError, ValueError):
+            return 400, {"ok": False, "message": "Невірне введення"}
+        # Handlers return a body, or (status, body) when the answer is not a plain 200
+        if isinstance(result, tuple):
+            return result
+        return 200, result
+
+    async def serve_client(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0) or 0)
+                if length > MAX_BODY:
+                    status, payload = 413, {"ok": False, "message": "Запит завеликий"}
+                    keep_alive = False
+                else:
+                    raw = await reader.readexactly(length) if length else b""
+                    path = path.split("?", 1)[0]
+                    if path in SLOW_ROUTES:
+                        # Password hashing takes tens of milliseconds; keep it off the event loop
+                        status, payload = await asyncio.to_thread(self.handle, method, path, raw)
+                    else:
+                        status, payload = self.handle(method, path, raw)
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                writer.write(f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                             f"Content-Type: application/json; charset=utf-8\r\n"
+                             f"Content-Length: {len(data)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch_persistence(self):
+        # Same role as the GUI's root.after poll: run durability callbacks
+        while True:
+            self.db.dispatch_acks()
+            await asyncio.sleep(0.05)
+
+    async def run(self, host="127.0.0.1", port=8080, unix_path=None):
+        if unix_path:
+            server = await asyncio.start_unix_server(self.serve_client, path=unix_path)
+        else:
+            server = await asyncio.start_server(self.serve_client, host, port)
+        # SIGTERM/SIGINT stop the loop cleanly so main() can flush the database
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        if metrics.configure_from_env(loop.call_later):
+            metrics.instrument(self.db, "db")
+            metrics.instrument(self.service, "service")
+            self.routes = {path: metrics.timed(f"api{path}", handler) for path, handler in self.routes.items()}
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        poller = asyncio.ensure_future(self.dispatch_persistence())
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            poller.cancel()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Банківська система без графічного інтерфейсу (JSON API)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix", help="шлях до Unix-сокета замість TCP")
+    parser.add_argument("--data", default="data.json")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    args = parser.parse_args(argv)
+    db = Database(args.data, journal=True, lazy=True, async_writes=True, backend=args.backend)
+    try:
+        asyncio.run(BankServer(db).run(args.host, args.port, args.unix))
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
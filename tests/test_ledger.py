@@ -0,0 +1,153 @@
+import csv
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import Database
+from models.importer import BulkImporter
+from models.money import to_minor
+from models.storage import CHECKPOINT_EVERY, Ledger, timestamp_key
+
+# Ledger checked against recomputing the sums from scratch, with entries arriving out
+# of time order and being removed again; Database.balance_at checked on both backends
+# against a replay of imported history and of deposits, transfers and bill payments
+
+class LedgerTest(unittest.TestCase):
+    def check(self, ledger, entries, rng):
+        self.assertEqual(ledger.total, sum(amount for _, _, amount in entries))
+        self.assertEqual(list(ledger.keys), sorted(key for key, _, _ in entries))
+        for key in [rng.randrange(-10, 1010) for _ in range(20)] + [key for key, _, _ in entries[:5]]:
+            self.assertEqual(ledger.total_through(key), sum(amount for k, _, amount in entries if k <= key))
+
+    def test_matches_brute_force(self):
+        for ref_typecode in (None, "q"):
+            rng = random.Random(7)
+            ledger = Ledger(ref_typecode)
+            entries = []
+            for ref in range(CHECKPOINT_EVERY * 6):
+                if entries and rng.random() < 0.25:
+                    entry = entries.pop(rng.randrange(len(entries)))
+                    ledger.remove(entry[0], entry[1])
+                else:
+                    # Mostly appends, with every few entries landing in the past
+                    key = ref if rng.random() < 0.7 else rng.randrange(ref + 1)
+                    entry = (key, ref, rng.randrange(-1000, 1000))
+                    ledger.insert(*entry)
+                    entries.append(entry)
+                if ref % 25 == 0:
+                    self.check(ledger, entries, rng)
+            self.check(ledger, entries, rng)
+
+class BalanceAtTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="bank-test-")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def open(self, backend):
+        return Database(os.path.join(self.directory, backend, "data.json"), backend=backend, journal=True, lazy=True,
+                        log_path=os.path.join(self.directory, backend, "log.jsonl"))
+
+    def write_csv(self, name, fields, rows):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def import_history(self, rng, start):
+        # Opening balances already include the imported history, as in a real export
+        accounts = {"hist1": ("alice", 5000), "hist2": ("alice", 200), "hist3": ("bob", 0)}
+        history = []
+        for index in range(150):
+            account_id = rng.choice(sorted(accounts))
+            history.append({"transaction_id": f"h{index}", "account_id": account_id,
+                            "amount": f"{rng.randrange(-50000, 90000) / 100:.2f}",
+                            "transaction_type": rng.choice(("deposit", "transfer", "bill_payment")),
+                            "timestamp": (start + timedelta(minutes=rng.randrange(10000))).isoformat()})
+        paths = [
+            self.write_csv("users.csv", ("username", "password", "role"),
+                           [{"username": name, "password": "secret1", "role": "client"} for name in ("alice", "bob")]),
+            self.write_csv("accounts.csv", ("account_id", "username", "balance"),
+                           [{"account_id": account_id, "username": name, "balance": balance}
+                            for account_id, (name, balance) in accounts.items()]),
+            self.write_csv("transactions.csv", ("transaction_id", "account_id", "amount", "transaction_type", "timestamp"),
+                           history),
+        ]
+        return paths, {account_id: to_minor(balance) for account_id, (_, balance) in accounts.items()}, history
+
+    def test_matches_replayed_history(self):
+        for backend in ("json", "sqlite"):
+            with self.subTest(backend=backend):
+                self.check_backend(backend)
+
+    def check_backend(self, backend):
+        rng = random.Random(3)
+        start = datetime(2024, 1, 1)
+        paths, opening, history = self.import_history(rng, start)
+        os.makedirs(os.path.join(self.directory, backend))
+        db = self.open(backend)
+        try:
+            importer = BulkImporter(db)
+            for path in paths:
+                importer.import_file(path)
+            importer.finish()
+            self.assertEqual(importer.errors, [])
+            # (time, balances) after the import and after every public operation;
+            # each operation is stamped strictly between two of these times
+            balances = dict(opening)
+            checkpoints = []
+            for index in range(60):
+                when = datetime.now()
+                checkpoints.append((when, dict(balances)))
+                while datetime.now() <= when:
+                    pass
+                account = db.get_account(rng.choice(sorted(balances)))
+                amount = to_minor(rng.randrange(1, 200000) / 100)
+                operation = rng.random()
+                if operation < 0.4:
+                    # At most 60 deposits of under 2,000: well inside the daily limit
+                    self.assertTrue(db.add_deposit(account, amount)[0])
+                    balances[account.account_id] += amount
+                elif operation < 0.8:
+                    target = db.get_account(rng.choice([account_id for account_id in sorted(balances) if account_id != account.account_id]))
+                    ok, _ = db.transfer(account, target, amount)
+                    self.assertEqual(ok, amount <= balances[account.account_id])
+                    if ok:
+                        balances[account.account_id] -= amount
+                        balances[target.account_id] += amount
+                else:
+                    ok, _ = db.pay_bill(account, amount)
+                    self.assertEqual(ok, amount <= balances[account.account_id])
+                    if ok:
+                        balances[account.account_id] -= amount
+            checkpoints.append((datetime.now(), dict(balances)))
+        finally:
+            db.close()
+        db = self.open(backend)
+        try:
+            for account_id, balance in opening.items():
+                self.assertEqual(db.get_account(account_id).balance, balances[account_id])
+                # Before the import: replay the history forwards from the balance it started at
+                entries = [(datetime.fromisoformat(row["timestamp"]), to_minor(row["amount"]))
+                           for row in history if row["account_id"] == account_id]
+                initial = balance - sum(amount for _, amount in entries)
+                for minutes in range(-1, 10001, 97):
+                    when = start + timedelta(minutes=minutes)
+                    expected = initial + sum(amount for timestamp, amount in entries if timestamp <= when)
+                    self.assertEqual(db.balance_at(account_id, when), expected)
+                for when, expected in checkpoints:
+                    self.assertEqual(db.balance_at(account_id, when), expected[account_id])
+        finally:
+            db.close()
+
+if __name__ == "__main__":
+    unittest.main()
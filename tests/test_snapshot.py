@@ -0,0 +1,56 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.core import UserRole
+from models.database import Database
+from models.money import to_minor
+from models.snapshot import MAGIC
+
+# A binary snapshot seeds a new SQLite database with exactly the rows it holds
+
+class BinarySeedTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="bank-test-")
+        self.log_path = os.path.join(self.directory, "log.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def contents(self, db):
+        users = sorted((user.user_id, user.username, user.password, user.role.value)
+                       for user in (db.get_user_by_username(name) for name in ("client1", "employee1", "seedtest")))
+        accounts = sorted((account.account_id, account.user_id, account.balance, account.is_blocked)
+                          for user_id, _, _, _ in users for account in db.get_user_accounts(user_id))
+        return users, accounts, sorted(db.transaction_records())
+
+    def test_sqlite_seeded_from_binary_snapshot(self):
+        source = Database(os.path.join(self.directory, "data.json"), lazy=True, log_path=self.log_path)
+        try:
+            source.register_user("seedtest", "secret1", UserRole.CLIENT)
+            client = source.get_user_by_username("seedtest")
+            account = source.get_user_accounts(client.user_id)[0]
+            source.add_deposit(account, to_minor("250.50"))
+            source.transfer(account, source.get_account("a1"), to_minor(40))
+            source.block_account("a1")
+            expected = self.contents(source)
+            snapshot_path = os.path.join(self.directory, "seed.snap")
+            source.write_snapshot(snapshot_path, "binary")
+        finally:
+            source.close()
+        seeded = Database(snapshot_path, backend="sqlite", log_path=self.log_path)
+        try:
+            self.assertEqual(seeded.file_path, os.path.join(self.directory, "seed.db"))
+            self.assertEqual(self.contents(seeded), expected)
+        finally:
+            seeded.close()
+        # The snapshot itself is only read
+        with open(snapshot_path, "rb") as f:
+            self.assertEqual(f.read(len(MAGIC)), MAGIC)
+
+if __name__ == "__main__":
+    unittest.main()